@@ -0,0 +1,86 @@
+# pipeline_worker.py
+"""
+Long-lived smoke_test runner used by the API when BP_WORKERS > 0
+(see backend/process.py).
+
+The pipeline is imported once; OCR engines, models and caches then stay loaded
+across jobs instead of being rebuilt by a fresh `python smoke_test.py` per run.
+The parsed config is not kept: every job re-reads config.yaml.
+
+Protocol, one JSON object per line:
+  stdin : {"argv": [<smoke_test.py arguments>]}
+  stdout: {"returncode": int, "stdout": str, "stderr": str}
+
+During a job fds 1/2 point at temp files, so everything the job prints
+(including native libraries and forked page workers) is captured exactly as a
+child process's output would be; only the last TAIL_BYTES of each are sent.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+TAIL_BYTES = 4 * 50_000 + 4  # matches backend/process.py
+
+
+def _tail(f) -> str:
+    f.flush()
+    size = os.fstat(f.fileno()).st_size
+    f.seek(max(0, size - TAIL_BYTES))
+    return f.read().decode("utf-8", errors="replace")
+
+
+def run_job(argv, smoke_test) -> dict:
+    # each job reads config.yaml as a fresh smoke_test.py would, even if it
+    # was edited within the file system's mtime resolution
+    smoke_test.load_config.cache_clear()
+    saved = os.dup(1), os.dup(2)
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        code = 0
+        try:
+            smoke_test.main(argv)
+        except SystemExit as e:  # argparse errors, explicit exits
+            if isinstance(e.code, int) or e.code is None:
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+        return {"returncode": code, "stdout": _tail(out), "stderr": _tail(err)}
+
+
+def main():
+    # replies go to a private copy of stdout; fd 1 itself is only ever a job's
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+
+    import smoke_test  # the expensive part, paid once per worker
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            res = run_job(json.loads(line)["argv"], smoke_test)
+        except Exception as e:
+            res = {"returncode": 1, "stdout": "", "stderr": f"[worker] bad job: {e}"}
+        proto.write(json.dumps(res, ensure_ascii=False) + "\n")
+        proto.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 # runner.py
 
-import argparse, os, yaml
+import argparse, os
 
-from src.common.utils import ensure_dir, imread, imwrite, draw_boxes, save_json
+from src.common.utils import ensure_dir, setup_opencv, imread, imwrite, draw_boxes, save_json
+from src.common.config import load_config, RunConfig
 from src.detectors.panels import detect_panels
-from src.detectors.bubbles import detect_bubbles_in_panel
+from src.detectors.bubbles import detect_bubbles_page
 from src.ocr.ocr import ocr_bubbles
 
 
@@ -14,9 +15,10 @@ def main():
     ap.add_argument("--out", required=True)
     ap.add_argument("--config", default="config.yaml")
     args = ap.parse_args()
+    setup_opencv(os.cpu_count() or 1)
 
-    with open(args.config, 'r', encoding='utf-8') as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_config(args.config)
+    rcfg = RunConfig.from_dict(cfg)
 
     ensure_dir(args.out)
 
@@ -24,21 +26,20 @@ def main():
     name = os.path.splitext(os.path.basename(args.image))[0]
 
     panel_boxes = detect_panels(bgr, cfg)
-    bubble_boxes = []
-    for p in panel_boxes:
-        bubble_boxes.extend(detect_bubbles_in_panel(bgr, p, cfg))
+    bubble_boxes = detect_bubbles_page(bgr, panel_boxes, cfg)
 
     overlay = draw_boxes(
         bgr,
         panel_boxes,
-        tuple(cfg.get('panel_color', [0, 102, 255])),
-        cfg.get('box_thickness', 2)
+        rcfg.panel_color,
+        rcfg.box_thickness
     )
     overlay = draw_boxes(
         overlay,
         bubble_boxes,
-        tuple(cfg.get('bubble_color', [0, 200, 0])),
-        cfg.get('box_thickness', 2)
+        rcfg.bubble_color,
+        rcfg.box_thickness,
+        inplace=True,  # overlay is already our own copy
     )
 
     imwrite(os.path.join(args.out, f"{name}_overlay.png"), overlay)
@@ -9,7 +9,7 @@ Pipeline per image:
   4) OCR each bubble (multi-backend, first non-empty wins)
   5) Print a clean transcript to the terminal (panel → bubble order)
   6) Save:
-       - overlays: *_panels.png, *_bubbles.png
+       - overlays: *_panels.png, *_bubbles.png (.jpg with --fast-debug)
        - JSON per page with boxes, OCR and transcript
        - TXT transcript per page
   7) JSONL append with panel records (for summarizers)
@@ -34,18 +34,24 @@ import argparse
 import glob
 import json
 import os
-from typing import List, Dict
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, List, Dict, Tuple
 
 import cv2
-import yaml
+import numpy as np
 
 # --- project imports (existing) ---
-from src.common.utils import ensure_dir, imread, imwrite, draw_boxes, save_json
+from src.common.utils import ensure_dir, setup_opencv, imread, iter_images, imwrite, draw_boxes, save_json
+from src.common.config import load_config, RunConfig
 from src.detectors.panels import detect_panels
-from src.detectors.bubbles import detect_bubbles_in_panel
+from src.detectors.bubbles import PagePriors, detect_bubbles_page
 from src.pipeline.reconcile import reconcile_page
-from src.ocr.ocr import ocr_bubbles
+from src.ocr.ocr import ocr_bubbles, BubbleBatcher
 from src.common.transcript import make_transcript, save_transcript
+from src.export.jsonl_writer import dumps_line
 
 # Summarizers (new/updated)
 from src.llm.summarize import (
@@ -81,13 +87,24 @@ except Exception:
 
 # -------------------- small helpers --------------------
 
+def is_manifest(path: str) -> bool:
+    """A .json --input is a batch manifest: a list of image/folder paths."""
+    return path.lower().endswith(".json") and os.path.isfile(path)
+
 def list_images(path_or_dir: str) -> List[str]:
-    """Return a sorted list of image paths (or the single path if a file)."""
+    """
+    Return a sorted list of image paths (or the single path if a file).
+    A manifest expands each entry the same way, keeping the manifest's order.
+    """
     if os.path.isdir(path_or_dir):
         files = []
         for ext in ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tif", "*.tiff"):
             files.extend(glob.glob(os.path.join(path_or_dir, ext)))
         return sorted(files)
+    if is_manifest(path_or_dir):
+        with open(path_or_dir, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        return [p for e in entries if not is_manifest(e) for p in list_images(e)]
     return [path_or_dir]
 
 def safe_dbg_dirs(input_path: str):
@@ -95,11 +112,16 @@ def safe_dbg_dirs(input_path: str):
     Build Windows-safe debug folder names near the input.
     If input is a folder: <parent>\<basename>_panels_dbg / _bubbles_dbg
     If input is a file:   <parent>\<file_stem>_panels_dbg / _bubbles_dbg
+    If input is a manifest: <parent>\batch_panels_dbg / _bubbles_dbg (manifests
+    are usually per-run temp files, so their name is not reused)
     """
     inp = input_path.rstrip("/\\")
     if os.path.isdir(inp):
         base_dir = os.path.dirname(inp) or "."
         base_name = os.path.basename(inp) or "input"
+    elif is_manifest(inp):
+        base_dir = os.path.dirname(inp) or "."
+        base_name = "batch"
     else:
         base_dir = os.path.dirname(inp) or "."
         base_name = os.path.splitext(os.path.basename(inp))[0] or "input"
@@ -109,46 +131,101 @@ def safe_dbg_dirs(input_path: str):
     )
 
 
+# -------------------- background writes --------------------
+# Overlay PNG encodes and JSON dumps run on a small thread pool so they overlap
+# with the next page. Images/dicts handed over are never mutated afterwards, so
+# no defensive copy is needed. The pool is per process (pool workers are forked).
+
+_WRITE_POOL = None
+_WRITE_POOL_PID = None
+_PENDING_WRITES: List[Future] = []
+_PENDING_LOCK = threading.Lock()
+
+
+def _write_async(fn, *a) -> None:
+    global _WRITE_POOL, _WRITE_POOL_PID
+    with _PENDING_LOCK:
+        if _WRITE_POOL is None or _WRITE_POOL_PID != os.getpid():
+            _WRITE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bp-write")
+            _WRITE_POOL_PID = os.getpid()
+            _PENDING_WRITES.clear()
+        _PENDING_WRITES.append(_WRITE_POOL.submit(fn, *a))
+
+
+def _drain_writes() -> None:
+    """Wait for queued writes; re-raises the first write error."""
+    with _PENDING_LOCK:
+        futs = list(_PENDING_WRITES)
+        _PENDING_WRITES.clear()
+    for fut in futs:
+        fut.result()
+
+
 # -------------------- core processing --------------------
 
-def process_image(path: str, args, dbg_panels_dir: str, dbg_bubbles_dir: str, cfg: Dict) -> Dict:
+def detect_page(path: str, bgr, args, dbg_panels_dir: str, dbg_bubbles_dir: str,
+                cfg: Dict, rcfg: RunConfig) -> Dict:
     """
-    Process one image and return a panel record dict for JSONL.
+    Detection stage: panels, first-pass bubbles, reconciliation and both debug overlays.
+    Returns a page state dict consumed by ocr_page / finish_page.
     """
     name = os.path.splitext(os.path.basename(path))[0]
-    bgr = imread(path)
-    if bgr is None:
-        print(f"[!] Failed to read {path}")
-        return {}
 
     # 1) Panel detection
     panel_boxes = detect_panels(bgr, cfg)
     overlay_panels = draw_boxes(
         bgr,
         panel_boxes,
-        tuple(cfg.get("panel_color", [0, 102, 255])),
-        int(cfg.get("box_thickness", 2)),
+        rcfg.panel_color,
+        rcfg.box_thickness,
         labels=[f"P{i}" for i in range(len(panel_boxes))],
     )
-    imwrite(os.path.join(dbg_panels_dir, f"{name}_panels.png"), overlay_panels)
+    dbg_ext = ".jpg" if args.fast_debug else ".png"
+    _write_async(imwrite, os.path.join(dbg_panels_dir, f"{name}_panels{dbg_ext}"), overlay_panels)
 
     # 2) Bubble detection (first pass)
-    bubble_boxes = []
-    for p_box in panel_boxes:
-        bubble_boxes.extend(detect_bubbles_in_panel(bgr, p_box, cfg))
+    priors = PagePriors(bgr)
+    bubble_boxes = detect_bubbles_page(bgr, panel_boxes, cfg, priors=priors)
 
     # 3) Reconcile with FULL-PAGE OCR (also does fallback words→bubbles)
-    bubble_boxes = reconcile_page(bgr, panel_boxes, bubble_boxes, cfg, verbose=args.recon_verbose)
+    bubble_boxes = reconcile_page(bgr, panel_boxes, bubble_boxes, cfg,
+                                  verbose=args.recon_verbose, priors=priors)
 
     # 4) Debug overlay for bubbles
     overlay_bubbles = draw_boxes(
         bgr,
         bubble_boxes,
-        tuple(cfg.get("bubble_color", [0, 200, 0])),
-        int(cfg.get("box_thickness", 2)),
+        rcfg.bubble_color,
+        rcfg.box_thickness,
         labels=[f"B{i}" for i in range(len(bubble_boxes))],
     )
-    imwrite(os.path.join(dbg_bubbles_dir, f"{name}_bubbles.png"), overlay_bubbles)
+    _write_async(imwrite, os.path.join(dbg_bubbles_dir, f"{name}_bubbles{dbg_ext}"), overlay_bubbles)
+
+    # Gray page, converted once and shared by ALL-OCR and bubble OCR
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY) if (args.all_ocr or not args.no_ocr) else None
+
+    return {"path": path, "name": name, "bgr": bgr, "gray": gray,
+            "panel_boxes": panel_boxes, "bubble_boxes": bubble_boxes}
+
+
+# GPU-heavy backends share one device: let only one of them run at a time.
+_GPU_BACKENDS = {"easyocr", "paddleocr"}
+_GPU_SEM = threading.Semaphore(1)
+
+
+def _run_backend_guarded(gray, be: str, cfg: Dict, verbose: bool):
+    if be in _GPU_BACKENDS:
+        with _GPU_SEM:
+            return run_backend(gray, be, cfg, verbose=verbose)
+    return run_backend(gray, be, cfg, verbose=verbose)
+
+
+def all_ocr_page(page: Dict, args, cfg: Dict, rcfg: RunConfig) -> Dict:
+    """
+    Optional ALL-OCR diagnostics for the full page.
+    Fills page['per_backend_json'] and page['merged_words'].
+    """
+    path, name, bgr = page["path"], page["name"], page["bgr"]
 
     # 5) Optional: ALL-OCR diagnostics for the full page
     per_backend_json = {}
@@ -157,27 +234,29 @@ def process_image(path: str, args, dbg_panels_dir: str, dbg_bubbles_dir: str, cf
         if not _ALL_OCR_AVAILABLE:
             print("[ALL-OCR] Skipped — backends/ensemble helpers not found.")
         else:
-            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-            ocrc = cfg.get("ocr", {})
-            backends = ocrc.get("backends", ["rapidocr", "paddleocr", "tesseract", "easyocr"])
+            gray = page["gray"]
+            backends = rcfg.ocr_backends
             print(f"[ALL-OCR] backends={backends}")
             all_words = []
-            for be in backends:
-                try:
-                    words = run_backend(gray, be, cfg, verbose=args.ocr_verbose) or []
-                    print(f"[ALL-OCR] {be}: {len(words)} words")
-                    per_backend_json[be] = words
-                    all_words.extend(words)
-                except Exception as e:
-                    print(f"[ALL-OCR] {be}: ERROR {e}")
+            # Backends are independent: run them concurrently, collect in config order.
+            with ThreadPoolExecutor(max_workers=max(1, len(backends))) as ex:
+                futs = {be: ex.submit(_run_backend_guarded, gray, be, cfg, args.ocr_verbose)
+                        for be in backends}
+                for be, fut in futs.items():
+                    try:
+                        words = fut.result() or []
+                        print(f"[ALL-OCR] {be}: {len(words)} words")
+                        per_backend_json[be] = words
+                        all_words.extend(words)
+                    except Exception as e:
+                        print(f"[ALL-OCR] {be}: ERROR {e}")
 
             if all_words:
-                iou_thr = float(ocrc.get("merge_iou", 0.5))
                 merged_words = merge_words(
                     all_words,
-                    iou_thr=iou_thr,
-                    prefer_longer_text=bool(ocrc.get("prefer_longer_text", True)),
-                    conf_weighted_avg=bool(ocrc.get("conf_weighted_avg", True)),
+                    iou_thr=rcfg.merge_iou,
+                    prefer_longer_text=rcfg.prefer_longer_text,
+                    conf_weighted_avg=rcfg.conf_weighted_avg,
                 )
                 # Save overlay
                 merged_overlay = bgr.copy()
@@ -185,22 +264,47 @@ def process_image(path: str, args, dbg_panels_dir: str, dbg_bubbles_dir: str, cf
                     x, y, w_, h_ = w["box"]
                     color = color_for_source(str(w.get("source", "")))
                     cv2.rectangle(merged_overlay, (x, y), (x + w_, y + h_), color, 2)
-                imwrite(os.path.join(args.out, f"{name}_allocr.png"), merged_overlay)
+                _write_async(imwrite, os.path.join(args.out, f"{name}_allocr.png"), merged_overlay)
                 # Save JSON
-                save_json(os.path.join(args.out, f"{name}_allocr.json"), {
+                _write_async(save_json, os.path.join(args.out, f"{name}_allocr.json"), {
                     "image": os.path.basename(path),
                     "per_backend": per_backend_json,
                     "merged": merged_words,
                 })
 
+    page["per_backend_json"] = per_backend_json
+    page["merged_words"] = merged_words
+    return page
+
+
+def ocr_page(page: Dict, args, cfg: Dict, rcfg: RunConfig) -> Dict:
+    """
+    OCR stage for a single page: ALL-OCR diagnostics, then OCR inside final bubbles.
+    Fills page['ocr_res'] as well.
+    """
+    page = all_ocr_page(page, args, cfg, rcfg)
+
     # 6) OCR inside final bubbles
     ocr_res = []
     if not args.no_ocr:
         try:
-            ocr_res = ocr_bubbles(bgr, bubble_boxes, cfg) or []
+            ocr_res = ocr_bubbles(page["bgr"], page["bubble_boxes"], cfg, gray=page["gray"]) or []
         except Exception as e:
             print(f"[WARN] OCR over bubbles failed ({e}); continuing without text.")
             ocr_res = []
+    page["ocr_res"] = ocr_res
+    return page
+
+
+def finish_page(page: Dict, args, page_index: int) -> Dict:
+    """
+    Output stage: print + save the transcript, write the per-page JSON and
+    return the panel record dict for JSONL.
+    """
+    path, name = page["path"], page["name"]
+    panel_boxes, bubble_boxes = page["panel_boxes"], page["bubble_boxes"]
+    ocr_res = page["ocr_res"]
+    per_backend_json, merged_words = page["per_backend_json"], page["merged_words"]
 
     # 7) Build + print transcript (terminal) and save as TXT
     lines, text = make_transcript(panel_boxes, bubble_boxes, ocr_res)
@@ -226,7 +330,7 @@ def process_image(path: str, args, dbg_panels_dir: str, dbg_bubbles_dir: str, cf
         outrec["page_ocr_merged"] = merged_words
     if per_backend_json:
         outrec["page_ocr_per_backend_counts"] = {k: len(v) for k, v in per_backend_json.items()}
-    save_json(os.path.join(args.out, f"{name}.json"), outrec)
+    _write_async(save_json, os.path.join(args.out, f"{name}.json"), outrec)
 
     print(f"[-] {name}: panels={len(panel_boxes)}, bubbles={len(bubble_boxes)}")
 
@@ -234,7 +338,7 @@ def process_image(path: str, args, dbg_panels_dir: str, dbg_bubbles_dir: str, cf
     # For simplicity, we create one panel entry per page (joining bubbles) so page grouping works.
     # If your pipeline already writes true panel records elsewhere, adapt accordingly.
     panel_record = {
-        "page_index": args._page_counter,
+        "page_index": page_index,
         "page_id": name,
         "panel_index": 0,
         "image_path": path,
@@ -244,11 +348,193 @@ def process_image(path: str, args, dbg_panels_dir: str, dbg_bubbles_dir: str, cf
     return panel_record
 
 
+def process_image(path: str, args, dbg_panels_dir: str, dbg_bubbles_dir: str, cfg: Dict,
+                  rcfg: RunConfig, page_index: int = 0) -> Tuple[int, Dict]:
+    """
+    Process one image and return (page_index, panel record dict for JSONL).
+    Top-level and picklable-args only, so it can run inside a process pool.
+    """
+    bgr = imread(path)
+    if bgr is None:
+        print(f"[!] Failed to read {path}")
+        return page_index, {}
+    page = detect_page(path, bgr, args, dbg_panels_dir, dbg_bubbles_dir, cfg, rcfg)
+    page = ocr_page(page, args, cfg, rcfg)
+    rec = finish_page(page, args, page_index)
+    # Pool workers exit without running atexit hooks, so flush this page's writes here.
+    _drain_writes()
+    return page_index, rec
+
+
+# -------------------- in-process stage pipeline --------------------
+
+_STOP = object()
+
+
+def _stage(fn, q_in: queue.Queue, q_out: queue.Queue, errors: List[BaseException]):
+    """Pop items, apply fn, push results; forward _STOP. After a failure keep
+    draining q_in (so upstream never blocks on a full queue) but drop items."""
+    while True:
+        item = q_in.get()
+        if item is _STOP:
+            break
+        if errors:
+            continue
+        try:
+            out = fn(item)
+        except BaseException as e:
+            errors.append(e)
+            continue
+        if out is not None:
+            q_out.put(out)
+    q_out.put(_STOP)
+
+
+def _ocr_stage(q_in: queue.Queue, q_out: queue.Queue, errors: List[BaseException],
+               args, cfg: Dict, rcfg: RunConfig):
+    """
+    Last stage: bubble ROIs from consecutive pages go into one BubbleBatcher,
+    flushed when it reaches ocr.batch_size or no page arrives within
+    ocr.flush_timeout seconds; each flushed page is then written out.
+    """
+    batcher = BubbleBatcher(cfg, batch_size=rcfg.ocr_batch_size)
+    flush_timeout = rcfg.ocr_flush_timeout
+    pending: List[Tuple[int, Dict]] = []
+
+    def _flush():
+        try:
+            results = batcher.flush()
+        except Exception as e:
+            print(f"[WARN] OCR over bubbles failed ({e}); continuing without text.")
+            results = {}
+        for i, page in pending:
+            page["ocr_res"] = results.get(i, [])
+            q_out.put((i, finish_page(page, args, i)))
+        pending.clear()
+
+    while True:
+        try:
+            item = q_in.get(timeout=flush_timeout if pending else None)
+        except queue.Empty:
+            try:
+                _flush()
+            except BaseException as e:
+                errors.append(e)
+            continue
+        if item is _STOP:
+            break
+        if errors:
+            continue
+        try:
+            i, page = item
+            page = all_ocr_page(page, args, cfg, rcfg)
+            if not args.no_ocr:
+                batcher.add_page(i, page["bgr"], page["bubble_boxes"], gray=page["gray"])
+            pending.append((i, page))
+            if args.no_ocr or batcher.full():
+                _flush()
+        except BaseException as e:
+            errors.append(e)
+    if pending and not errors:
+        try:
+            _flush()
+        except BaseException as e:
+            errors.append(e)
+    q_out.put(_STOP)
+
+
+def run_pipelined(images: List[str], args, dbg_panels_dir: str, dbg_bubbles_dir: str, cfg: Dict,
+                  rcfg: RunConfig, maxsize: int = 4) -> Iterator[Tuple[int, Dict]]:
+    """
+    Decode → detect → OCR/write as three threads joined by bounded queues, so
+    decoding the next page and detecting on it overlap with OCR on the previous one.
+    Yields (page_index, record) pairs as pages finish; every stage is a single
+    FIFO thread, so they come out in page order.
+    """
+    q_decoded: queue.Queue = queue.Queue(maxsize=maxsize)
+    q_detected: queue.Queue = queue.Queue(maxsize=maxsize)
+    q_done: queue.Queue = queue.Queue()
+    errors: List[BaseException] = []
+
+    def _decode():
+        # Reads run ahead of detection by up to cfg 'prefetch' images.
+        try:
+            for i, (p, bgr) in enumerate(iter_images(images, rcfg.prefetch)):
+                if errors:
+                    break
+                print(f"[+] Processing {p}")
+                if bgr is None:
+                    print(f"[!] Failed to read {p}")
+                    continue
+                q_decoded.put((i, p, bgr))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            q_decoded.put(_STOP)
+
+    def _detect(item):
+        i, p, bgr = item
+        return i, detect_page(p, bgr, args, dbg_panels_dir, dbg_bubbles_dir, cfg, rcfg)
+
+    threads = [
+        threading.Thread(target=_decode, daemon=True),
+        threading.Thread(target=_stage, args=(_detect, q_decoded, q_detected, errors), daemon=True),
+        threading.Thread(target=_ocr_stage, args=(q_detected, q_done, errors, args, cfg, rcfg), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    while True:
+        item = q_done.get()
+        if item is _STOP:
+            break
+        yield item
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+
+
+def warmup(args, cfg: Dict, rcfg: RunConfig) -> None:
+    """
+    Run each lazily-initialized stage once on a 64×64 black image so imports and
+    model construction happen before the first real page (and once per worker).
+    Failures are reported and ignored; the real pages will surface them.
+    """
+    dummy = np.zeros((64, 64, 3), np.uint8)
+    t0 = time.perf_counter()
+    try:
+        detect_panels(dummy, cfg)
+        reconcile_page(dummy, [(0, 0, 64, 64)], [], cfg)
+        if not args.no_ocr:
+            ocr_bubbles(dummy, [(0, 0, 64, 64)], cfg)
+        if args.all_ocr and _ALL_OCR_AVAILABLE:
+            for be in rcfg.ocr_backends:
+                run_backend(dummy[:, :, 0], be, cfg)
+    except Exception as e:
+        print(f"[warmup] WARN {e}")
+    print(f"[warmup] ready in {time.perf_counter() - t0:.2f}s (pid {os.getpid()})")
+
+
+def _init_worker(args, cfg: Dict, rcfg: RunConfig):
+    """Process-pool initializer: one OpenCV thread per worker process, then warm up."""
+    setup_opencv(1, verbose=False)
+    warmup(args, cfg, rcfg)
+
+
+def _resolve_workers(args, rcfg: RunConfig, n_images: int) -> int:
+    """--workers beats cfg['workers']; 0/None means os.cpu_count(). Never more than the page count."""
+    n = args.workers if args.workers is not None else rcfg.workers
+    if n <= 0:
+        n = os.cpu_count() or 1
+    return max(1, min(n, n_images))
+
+
 # -------------------- CLI --------------------
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser()
-    ap.add_argument("--input", required=True, help="Folder with page images OR a single image path")
+    ap.add_argument("--input", required=True, help="Folder with page images, a single image path, or a .json manifest "
+                         "(list of image/folder paths, run in list order)")
     ap.add_argument("--out", required=True, help="Output folder (overlays + JSON + TXT)")
     ap.add_argument("--config", default="config.yaml", help="YAML config file")
 
@@ -257,6 +543,10 @@ def main():
     ap.add_argument("--recon-verbose", action="store_true", help="Verbose logs for page-level reconciliation")
     ap.add_argument("--all-ocr", action="store_true", help="Run full-page ALL-OCR diagnostics (if helpers exist)")
     ap.add_argument("--ocr-verbose", action="store_true", help="Verbose per-backend logs for --all-ocr")
+    ap.add_argument("--fast-debug", action="store_true",
+                    help="Write debug overlays as JPEG (q=85) instead of PNG")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Pages processed in parallel (default: cfg 'workers', else CPU count; 1 = sequential)")
 
     # summarizer toggles
     ap.add_argument("--jsonl", default="panels.jsonl", help="Filename for panels JSONL")
@@ -289,10 +579,10 @@ def main():
     ap.add_argument("--mlm-model", default="distilroberta-base",
                     help="Masked language model name (used only with --mlm-refiner).")
 
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
-    with open(args.config, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
+    cfg = load_config(args.config)
+    rcfg = RunConfig.from_dict(cfg)
 
     ensure_dir(args.out)
     dbg_panels_dir, dbg_bubbles_dir = safe_dbg_dirs(args.input)
@@ -304,21 +594,42 @@ def main():
         print(f"[!] No images found in {args.input}")
         return
 
-    # Process images → per-page JSON and gather panel records for JSONL
-    args._page_counter = 0
-    panel_rows: List[Dict] = []
-    for p in images:
-        print(f"[+] Processing {p}")
-        rec = process_image(p, args, dbg_panels_dir, dbg_bubbles_dir, cfg)
-        if rec:
-            panel_rows.append(rec)
-        args._page_counter += 1
-
-    # Write panels.jsonl
+    # Process images → per-page JSON and gather panel records for JSONL.
+    # Pages are independent, so they fan out over a process pool; results are
+    # gathered in submission order to keep page_index deterministic. With a
+    # single worker the stages run as an in-process thread pipeline instead.
+    workers = _resolve_workers(args, rcfg, len(images))
+    if workers > 1:
+        # page-level parallelism: keep OpenCV/OpenMP from oversubscribing cores
+        os.environ.setdefault("OMP_NUM_THREADS", "1")
+        setup_opencv(1)
+    else:
+        setup_opencv(os.cpu_count() or 1)
+        warmup(args, cfg, rcfg)
+    # panels.jsonl is streamed: each record is appended (and flushed) as its page
+    # completes, so memory stays flat and readers can follow the file.
     jsonl_path = os.path.join(args.out, args.jsonl)
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for row in panel_rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    with open(jsonl_path, "wb") as jf:
+        def _emit(rec: Dict):
+            if rec:
+                jf.write(dumps_line(rec))
+                jf.flush()
+
+        if workers <= 1:
+            for _, rec in run_pipelined(images, args, dbg_panels_dir, dbg_bubbles_dir, cfg, rcfg):
+                _emit(rec)
+        else:
+            print(f"[+] Processing {len(images)} pages with {workers} workers")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(args, cfg, rcfg)) as ex:
+                futures = [
+                    ex.submit(process_image, p, args, dbg_panels_dir, dbg_bubbles_dir, cfg, rcfg, i)
+                    for i, p in enumerate(images)
+                ]
+                for fut in futures:
+                    _emit(fut.result()[1])
+
+    _drain_writes()
     print(f"[√] JSONL → {jsonl_path}")
 
     # -------------- PANEL-LEVEL SUMMARIES --------------
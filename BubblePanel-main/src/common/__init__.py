@@ -2,16 +2,25 @@
 
 from .utils import (
     ensure_dir,
+    setup_opencv,
     imread,
+    iter_images,
     imwrite,
     draw_boxes,
+    fill_rects,
     save_json,
 )
+from .config import load_config, RunConfig
 
 __all__ = [
     "ensure_dir",
+    "setup_opencv",
     "imread",
+    "iter_images",
     "imwrite",
     "draw_boxes",
+    "fill_rects",
     "save_json",
+    "load_config",
+    "RunConfig",
 ]
@@ -0,0 +1,68 @@
+# src/common/config.py
+
+"""
+Config loading helpers.
+- load_config: parse a YAML file once per (path, mtime) (cached; treat the dict as read-only)
+- RunConfig: frozen, pre-cast view of the knobs read on every page (colors, OCR merge, runtime)
+Detectors still take the raw dict, since reconcile derives relaxed copies of it.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import yaml
+
+
+@lru_cache(maxsize=8)
+def _parse(path: str, mtime_ns: int) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_config(path: str) -> Dict:
+    """
+    Parse a YAML config file. Cached per path and modification time, so a
+    long-lived process sees edits to the file.
+    """
+    return _parse(path, os.stat(path).st_mtime_ns)
+
+
+load_config.cache_clear = _parse.cache_clear
+
+
+def _color(v, default) -> Tuple[int, int, int]:
+    return tuple(int(c) for c in (v or default))
+
+
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    panel_color: Tuple[int, int, int]
+    bubble_color: Tuple[int, int, int]
+    box_thickness: int
+    ocr_backends: Tuple[str, ...]
+    merge_iou: float
+    prefer_longer_text: bool
+    conf_weighted_avg: bool
+    ocr_batch_size: int
+    ocr_flush_timeout: float
+    workers: int
+    prefetch: int
+
+    @classmethod
+    def from_dict(cls, cfg: Dict) -> "RunConfig":
+        ocrc = cfg.get("ocr", {}) or {}
+        return cls(
+            panel_color=_color(cfg.get("panel_color"), [0, 102, 255]),
+            bubble_color=_color(cfg.get("bubble_color"), [0, 200, 0]),
+            box_thickness=int(cfg.get("box_thickness", 2)),
+            ocr_backends=tuple(ocrc.get("backends", ["rapidocr", "paddleocr", "tesseract", "easyocr"])),
+            merge_iou=float(ocrc.get("merge_iou", 0.5)),
+            prefer_longer_text=bool(ocrc.get("prefer_longer_text", True)),
+            conf_weighted_avg=bool(ocrc.get("conf_weighted_avg", True)),
+            ocr_batch_size=int(ocrc.get("batch_size", 32)),
+            ocr_flush_timeout=float(ocrc.get("flush_timeout", 0.5)),
+            workers=int(cfg.get("workers", 0) or 0),
+            prefetch=int(cfg.get("prefetch", 4)),
+        )
@@ -1,21 +1,48 @@
 from __future__ import annotations
 from typing import List, Tuple, Dict
+import bisect
 import os
 
+import numpy as np
+
 Box = Tuple[int, int, int, int]  # (x,y,w,h)
 
-def _center(b: Box):
-    x, y, w, h = b
-    return x + w / 2.0, y + h / 2.0
+def _as_array(boxes: List[Box]) -> np.ndarray:
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+def _reading_order(arr: np.ndarray) -> np.ndarray:
+    # top→bottom, then left→right (stable, like sorted() on (y, x))
+    return np.lexsort((arr[:, 0], arr[:, 1]))
 
-def _inside(b: Box, scope: Box) -> bool:
-    cx, cy = _center(b)
-    x, y, w, h = scope
-    return (x <= cx <= x + w) and (y <= cy <= y + h)
+def _assign_to_panels(bubbles: np.ndarray, panels: np.ndarray) -> List[List[int]]:
+    """
+    Sweep line over y: for every panel, the indices of bubbles whose center lies
+    inside it (edges inclusive). Panels are active between their top and bottom
+    edge; a bubble center is only tested against active panels, found by bisect
+    on their left edge. O((P+B) log(P+B)) instead of testing every pair.
+    """
+    cx = bubbles[:, 0] + bubbles[:, 2] / 2.0
+    cy = bubbles[:, 1] + bubbles[:, 3] / 2.0
+    # (y, kind, idx): at equal y, panel start (0) < bubble (1) < panel end (2)
+    events = [(float(panels[p, 1]), 0, p) for p in range(len(panels))]
+    events += [(float(panels[p, 1] + panels[p, 3]), 2, p) for p in range(len(panels))]
+    events += [(float(cy[b]), 1, b) for b in range(len(bubbles))]
+    events.sort()
 
-def _sort_reading_order(boxes: List[Box]) -> List[Box]:
-    # top→bottom, then left→right
-    return sorted(boxes, key=lambda b: (b[1], b[0]))
+    members: List[List[int]] = [[] for _ in range(len(panels))]
+    active: List[Tuple[float, int]] = []  # (left x, panel) sorted by x
+    for _, kind, i in events:
+        if kind == 0:
+            bisect.insort(active, (float(panels[i, 0]), i))
+        elif kind == 2:
+            active.pop(bisect.bisect_left(active, (float(panels[i, 0]), i)))
+        else:
+            x = cx[i]
+            hi = bisect.bisect_right(active, (x, len(panels)))
+            for px, p in active[:hi]:
+                if x <= px + panels[p, 2]:
+                    members[p].append(i)
+    return members
 
 def make_transcript(panel_boxes: List[Box],
                     bubble_boxes: List[Box],
@@ -33,18 +60,22 @@ def make_transcript(panel_boxes: List[Box],
     for r in (ocr_res or []):
         text_by_box[tuple(r["box"])] = (r.get("text", ""), r.get("backend", ""))
 
-    # sort panels in a stable reading order
-    panels_ord = _sort_reading_order(panel_boxes)
+    pa = _as_array(panel_boxes)
+    ba = _as_array(bubble_boxes)
+    # sort panels (and bubbles once) in a stable reading order
+    panels_ord = _reading_order(pa)
+    rank = np.empty(len(ba), dtype=np.int64)
+    rank[_reading_order(ba)] = np.arange(len(ba))
+    members = _assign_to_panels(ba, pa)
 
     for p_idx, p in enumerate(panels_ord, 1):
-        # bubbles that belong to this panel
-        in_panel = [b for b in bubble_boxes if _inside(b, p)]
-        in_panel = _sort_reading_order(in_panel)
+        # bubbles that belong to this panel, in reading order
+        in_panel = sorted(members[p], key=rank.__getitem__)
         if not in_panel:
             continue
         lines.append(f"[Panel {p_idx}]")
-        for b in in_panel:
-            txt, backend = text_by_box.get(tuple(b), ("", ""))
+        for bi in in_panel:
+            txt, backend = text_by_box.get(tuple(bubble_boxes[bi]), ("", ""))
             txt = (txt or "").strip()
             if not txt:
                 continue
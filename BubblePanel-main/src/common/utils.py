@@ -3,23 +3,53 @@
 """
 Utility helpers for I/O, drawing, and serialization.
 - Unicode-safe imread/imwrite (works on Windows paths)
-- Box drawing for debug overlays
-- JSON save with UTF-8
+- Prefetching image iterator (reads run ahead on a thread pool)
+- OpenCV runtime setup (optimized kernels, thread count)
+- Box drawing for debug overlays, batched box → mask rasterization
+- JSON save with UTF-8 (orjson when installed)
 """
 
 import os
 import json
-from typing import List, Tuple, Optional
+import mmap
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Tuple, Optional
 
 import cv2
 import numpy as np
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
+
+
+_DEFAULT_WRITE_PARAMS = {
+    ".png": [cv2.IMWRITE_PNG_COMPRESSION, 1],
+    ".jpg": [cv2.IMWRITE_JPEG_QUALITY, 85],
+    ".jpeg": [cv2.IMWRITE_JPEG_QUALITY, 85],
+}
+
 
 def ensure_dir(path: str) -> None:
     """Create directory if it does not exist."""
     os.makedirs(path, exist_ok=True)
 
 
+def setup_opencv(num_threads: int, verbose: bool = True) -> None:
+    """
+    Enable OpenCV's optimized kernels and size its internal thread pool.
+    Use 1 thread inside process-pool workers to avoid oversubscription.
+    """
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(max(1, int(num_threads)))
+    if not cv2.useOptimized():
+        print("[cv2] WARNING: optimized code paths unavailable (OpenCV built without SSE/AVX?)")
+    if verbose:
+        print(f"[cv2] optimized={cv2.useOptimized()} threads={cv2.getNumThreads()}")
+
+
 def imread(path: str) -> Optional[np.ndarray]:
     """
     Unicode-safe image read using imdecode.
@@ -27,21 +57,61 @@ def imread(path: str) -> Optional[np.ndarray]:
     """
     if not os.path.exists(path):
         return None
-    data = np.fromfile(path, dtype=np.uint8)
-    img = cv2.imdecode(data, cv2.IMREAD_COLOR)
-    return img
+    if os.name == "nt":
+        # mmap semantics differ on Windows; keep the plain read there
+        data = np.fromfile(path, dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    # Decode straight from a read-only mapping (no intermediate heap copy)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = np.frombuffer(mm, dtype=np.uint8)
+            try:
+                return cv2.imdecode(data, cv2.IMREAD_COLOR)
+            finally:
+                del data  # release the export before the map closes
+
+
+def iter_images(paths: Iterable[str], prefetch: int = 4) -> Iterator[Tuple[str, Optional[np.ndarray]]]:
+    """
+    Yield (path, imread(path)) in input order while up to `prefetch` reads
+    run ahead on a thread pool, hiding disk latency behind the caller's work.
+    """
+    if prefetch <= 1:
+        for p in paths:
+            yield p, imread(p)
+        return
+    it = iter(paths)
+    with ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="imread") as ex:
+        window = deque()
+        for p in it:
+            window.append((p, ex.submit(imread, p)))
+            if len(window) >= prefetch:
+                break
+        while window:
+            p, fut = window.popleft()
+            nxt = next(it, None)
+            if nxt is not None:
+                window.append((nxt, ex.submit(imread, nxt)))
+            yield p, fut.result()
 
 
-def imwrite(path: str, img: np.ndarray) -> None:
+def imwrite(path: str, img: np.ndarray, params: Optional[List[int]] = None) -> None:
     """
     Unicode-safe image write using imencode + tofile.
     Chooses encoder by extension; defaults to PNG if none.
+    Without explicit params: fast PNG (compression 1) and JPEG quality 85,
+    since these files are debug overlays, not pipeline inputs.
     """
     ext = os.path.splitext(path)[1] or ".png"
-    ok, buf = cv2.imencode(ext, img)
+    if params is None:
+        params = _DEFAULT_WRITE_PARAMS.get(ext.lower(), [])
+    ok, buf = cv2.imencode(ext, img, params)
     if not ok:
         # fallback to PNG if the chosen encoder failed
-        ok, buf = cv2.imencode(".png", img)
+        ok, buf = cv2.imencode(".png", img, _DEFAULT_WRITE_PARAMS[".png"])
     buf.tofile(path)
 
 
@@ -51,19 +121,40 @@ def draw_boxes(
     color: Tuple[int, int, int] = (0, 255, 0),
     thickness: int = 2,
     labels: Optional[List[str]] = None,
+    inplace: bool = False,
+    out: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     Draws axis-aligned boxes (x, y, w, h) with optional string labels.
-    Returns a copy with drawings (does not modify input).
+    Returns a copy with drawings (does not modify input) unless inplace=True,
+    or draws into a preallocated `out` buffer of the same shape/dtype.
+    All rectangles go to OpenCV in a single polylines call.
     """
-    out = img.copy()
-    for i, (x, y, w, h) in enumerate(boxes):
-        cv2.rectangle(out, (x, y), (x + w, y + h), color, thickness)
-        if labels and i < len(labels):
+    if inplace:
+        out = img
+    elif out is None:
+        out = img.copy()
+    elif out is not img:
+        np.copyto(out, img)
+    if len(boxes) == 0:
+        return out
+
+    bb = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+    x, y, w, h = bb[:, 0], bb[:, 1], bb[:, 2], bb[:, 3]
+    pts = np.stack([
+        np.stack([x, y], axis=1),
+        np.stack([x + w, y], axis=1),
+        np.stack([x + w, y + h], axis=1),
+        np.stack([x, y + h], axis=1),
+    ], axis=1)  # (N, 4, 2)
+    cv2.polylines(out, pts, True, color, thickness, cv2.LINE_8)
+
+    if labels:
+        for i in range(min(len(labels), len(bb))):
             cv2.putText(
                 out,
                 str(labels[i]),
-                (x, max(0, y - 5)),
+                (int(x[i]), max(0, int(y[i]) - 5)),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
                 color,
@@ -73,7 +164,45 @@ def draw_boxes(
     return out
 
 
+def fill_rects(
+    shape: Tuple[int, int],
+    boxes,
+    inclusive: bool = False,
+    value: int = 255,
+) -> np.ndarray:
+    """
+    Rasterize many filled (x, y, w, h) boxes into a uint8 mask in one pass
+    (difference image + 2D prefix sum) instead of one cv2.rectangle per box.
+    `inclusive=True` covers x..x+w / y..y+h like cv2.rectangle(..., -1).
+    Boxes are clipped to the mask.
+    """
+    H, W = int(shape[0]), int(shape[1])
+    mask = np.zeros((H, W), np.uint8)
+    if len(boxes) == 0:
+        return mask
+    bb = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    e = 1 if inclusive else 0
+    x0 = np.clip(bb[:, 0], 0, W); x1 = np.clip(bb[:, 0] + bb[:, 2] + e, 0, W)
+    y0 = np.clip(bb[:, 1], 0, H); y1 = np.clip(bb[:, 1] + bb[:, 3] + e, 0, H)
+    ok = (x1 > x0) & (y1 > y0)
+    x0, x1, y0, y1 = x0[ok], x1[ok], y0[ok], y1[ok]
+
+    diff = np.zeros((H + 1, W + 1), np.int32)
+    np.add.at(diff, (y0, x0), 1)
+    np.add.at(diff, (y0, x1), -1)
+    np.add.at(diff, (y1, x0), -1)
+    np.add.at(diff, (y1, x1), 1)
+    cover = diff.cumsum(0, dtype=np.int32).cumsum(1, dtype=np.int32)[:H, :W]
+    mask[cover > 0] = value
+    return mask
+
+
 def save_json(path: str, data) -> None:
     """Save a Python object as pretty UTF-8 JSON."""
+    if orjson is not None:
+        opts = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=opts))
+        return
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
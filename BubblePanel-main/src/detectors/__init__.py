@@ -1,10 +1,12 @@
 # src/detectors/__init__.py
 
 from .panels import detect_panels
-from .bubbles import detect_bubbles_in_panel, nms_boxes
+from .bubbles import PagePriors, detect_bubbles_page, detect_bubbles_in_panel, nms_boxes
 
 __all__ = [
     "detect_panels",
+    "PagePriors",
+    "detect_bubbles_page",
     "detect_bubbles_in_panel",
     "nms_boxes",
 ]
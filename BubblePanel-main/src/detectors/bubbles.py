@@ -1,54 +1,191 @@
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import threading
 import cv2, numpy as np
 
+from src.common.utils import fill_rects
+from src.detectors import morph
+
 # ---------- utilities ----------
 def _local_variance(gray: np.ndarray, k: int) -> np.ndarray:
-    f = gray.astype(np.float32)
-    m = cv2.blur(f, (k, k))
-    m2 = cv2.blur(f * f, (k, k))
-    return np.clip(m2 - m * m, 0, None)
+    # box mean and box mean-of-squares straight from uint8: no float copy of
+    # the input and no f*f temporary (sqrBoxFilter squares on the fly)
+    m = cv2.boxFilter(gray, cv2.CV_32F, (k, k))
+    m2 = cv2.sqrBoxFilter(gray, cv2.CV_32F, (k, k))
+    return cv2.max(cv2.subtract(m2, cv2.multiply(m, m)), 0)
+
+def _percentile(a: np.ndarray, q: float) -> float:
+    """
+    np.percentile(a, q) (linear method) via selection instead of a sort:
+    a 256-bin histogram for uint8 maps, np.partition on the two bracketing
+    order statistics otherwise.
+    """
+    n = a.size
+    idx = (n - 1) * (float(q) / 100.0)
+    lo = int(idx); hi = min(lo + 1, n - 1); t = idx - lo
+    if a.dtype == np.uint8:
+        hist = cv2.calcHist([a], [0], None, [256], [0, 256]).ravel()
+        cum = np.cumsum(hist.astype(np.int64))
+        v_lo = float(np.searchsorted(cum, lo, side="right"))
+        v_hi = float(np.searchsorted(cum, hi, side="right"))
+    else:
+        part = np.partition(a.ravel(), (lo, hi) if hi != lo else lo)
+        v_lo, v_hi = float(part[lo]), float(part[hi])
+    # same lerp form as NumPy (exact at both ends)
+    d = v_hi - v_lo
+    return v_hi - d * (1.0 - t) if t >= 0.5 else v_lo + d * t
+
+def _suppress(b1, a1, b2, a2, iou_thresh):
+    """(len(b1), len(b2)) mask of IoU > t for float32 xyxy boxes (inclusive pixels) and their areas."""
+    w = np.maximum(0, np.minimum(b1[:,None,2], b2[None,:,2]) - np.maximum(b1[:,None,0], b2[None,:,0]) + 1)
+    h = np.maximum(0, np.minimum(b1[:,None,3], b2[None,:,3]) - np.maximum(b1[:,None,1], b2[None,:,1]) + 1)
+    inter = w*h
+    # IoU > t  <=>  inter > t*union  (no divide, no epsilon)
+    union = a1[:,None]+a2[None,:]-inter
+    return inter > np.float32(iou_thresh)*union
+
+def _areas(bi):
+    return ((bi[:,2]-bi[:,0]+1)*(bi[:,3]-bi[:,1]+1)).astype(np.float32)
+
+def _nms_keep(bi, iou_thresh, scores=None):
+    """Indices of kept rows of int xyxy `bi`, largest area first (equal areas in
+    np.argsort's order, as NMS always visited them), or by descending `scores`
+    with ties in row order."""
+    a = _areas(bi)
+    if scores is None:
+        order = np.argsort(a.astype(np.float64))[::-1]
+    else:
+        order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    # pairwise IoU once, in visiting order; upper triangle = "j visited after i"
+    b = bi[order].astype(np.float32); a = a[order]
+    suppress = np.triu(_suppress(b, a, b, a, iou_thresh), 1)
+    alive = np.ones(len(b), dtype=bool)
+    # only boxes that overlap a later one can change `alive`; on real pages
+    # that is a handful, so the Python loop no longer runs once per box
+    for i in np.flatnonzero(suppress.any(axis=1)).tolist():
+        if alive[i]:
+            alive[suppress[i]] = False
+    return order[alive]
+
+def _xywh_list(bi):
+    return [(x1,y1,x2-x1,y2-y1) for x1,y1,x2,y2 in bi.tolist()]
 
 def _nms_xyxy(boxes_xyxy, iou_thresh=0.3):
     if not boxes_xyxy: return []
-    b = np.array(boxes_xyxy, dtype=float)
-    a = (b[:,2]-b[:,0]+1)*(b[:,3]-b[:,1]+1)
-    order = np.argsort(a)[::-1]; keep=[]
-    while order.size>0:
-        i=order[0]; keep.append(i)
-        xx1=np.maximum(b[i,0],b[order[1:],0]); yy1=np.maximum(b[i,1],b[order[1:],1])
-        xx2=np.minimum(b[i,2],b[order[1:],2]); yy2=np.minimum(b[i,3],b[order[1:],3])
-        w=np.maximum(0,xx2-xx1+1); h=np.maximum(0,yy2-yy1+1)
-        inter=w*h; iou=inter/(a[i]+a[order[1:]]-inter+1e-6)
-        order=order[np.where(iou<=iou_thresh)[0]+1]
-    out=[]; 
-    for i in keep:
-        x1,y1,x2,y2 = b[i].astype(int).tolist()
-        out.append((x1,y1,x2-x1,y2-y1))
-    return out
+    bi = np.asarray(boxes_xyxy, dtype=np.int64).reshape(-1, 4)
+    return _xywh_list(bi[_nms_keep(bi, iou_thresh)])
 
 def nms_boxes(boxes, iou_thresh=0.3):
     xyxy=[(x,y,x+w,y+h) for (x,y,w,h) in boxes]
     return _nms_xyxy(xyxy, iou_thresh)
 
+def nms_indices(boxes, iou_thresh=0.3, scores=None) -> List[int]:
+    """Indices of the (x, y, w, h) boxes NMS keeps, visiting by descending
+    `scores` (area when None); returned in input order."""
+    if not len(boxes): return []
+    bi = np.asarray([(x,y,x+w,y+h) for (x,y,w,h) in boxes], dtype=np.int64).reshape(-1, 4)
+    return np.sort(_nms_keep(bi, iou_thresh, scores)).tolist()
+
+def nms_add(kept, candidates, iou_thresh=0.3):
+    """
+    nms_boxes(kept + candidates) for a `kept` list that is itself an nms_boxes
+    output. Kept boxes that overlap no candidate can neither be suppressed nor
+    suppress anything, so only the candidates and the kept boxes they touch go
+    through NMS; the result (boxes and order) is identical to the full pass.
+    That needs a unique visiting order: with any two equal areas the full pass
+    runs instead.
+    """
+    if not kept or not candidates:
+        return nms_boxes(list(kept) + list(candidates), iou_thresh)
+    bi = np.asarray([(x,y,x+w,y+h) for (x,y,w,h) in list(kept) + list(candidates)],
+                    dtype=np.int64).reshape(-1, 4)
+    a = _areas(bi)
+    if len(np.unique(a)) < len(a):
+        return _xywh_list(bi[_nms_keep(bi, iou_thresh)])
+    n_k = len(kept)
+    b = bi.astype(np.float32)
+    touched = _suppress(b[n_k:], a[n_k:], b[:n_k], a[:n_k], iou_thresh).any(axis=0)
+    sub = np.concatenate([np.flatnonzero(touched), np.arange(n_k, len(bi))])
+    keep = np.concatenate([np.flatnonzero(~touched), sub[_nms_keep(bi[sub], iou_thresh)]])
+    keep = keep[np.lexsort((keep, -a[keep]))]  # full-pass order: area desc, then position
+    return _xywh_list(bi[keep])
+
+# ---------- page-level maps ----------
+class PagePriors:
+    """
+    Maps shared by every detection pass on a page. The page gray is computed
+    once; rim edges, local variance and top/black-hat are built over each
+    panel's crop (as a standalone call would, borders included) and memoized
+    per (panel, kernel size), so reconciliation retries reuse them.
+    Different maps can be built concurrently; each is built only once.
+    """
+
+    def __init__(self, bgr):
+        self.gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        self._memo: Dict[tuple, np.ndarray] = {}
+        self._building: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def crop(self, box) -> np.ndarray:
+        x0,y0,w0,h0 = box
+        return self.gray[y0:y0+h0, x0:x0+w0]
+
+    def _get(self, key: tuple, build) -> np.ndarray:
+        m = self._memo.get(key)
+        if m is not None:
+            return m
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+        with key_lock:
+            m = self._memo.get(key)
+            if m is None:
+                m = build()
+                self._memo[key] = m
+            return m
+
+    def edge(self, box) -> np.ndarray:
+        def build():
+            e = cv2.Canny(self.crop(box), 70, 160)
+            return cv2.dilate(e, morph.kernel(cv2.MORPH_ELLIPSE, 3),1)
+        return self._get(("edge", tuple(box)), build)
+
+    def var(self, box, k: int) -> np.ndarray:
+        return self._get(("var", tuple(box), k), lambda: _local_variance(self.crop(box), k))
+
+    def _hat(self, op, box, k: int) -> np.ndarray:
+        return cv2.morphologyEx(self.crop(box), op, morph.kernel(cv2.MORPH_RECT, k))
+
+    def tophat(self, box, k: int) -> np.ndarray:
+        return self._get(("tophat", tuple(box), k), lambda: self._hat(cv2.MORPH_TOPHAT, box, k))
+
+    def blackhat(self, box, k: int) -> np.ndarray:
+        return self._get(("blackhat", tuple(box), k), lambda: self._hat(cv2.MORPH_BLACKHAT, box, k))
+
 # ---------- grow constrained by edges + whiteness ----------
-def _edge_constrained_grow(seeds, white, edge, grow_px, iters, roi):
+def _edge_constrained_grow(seeds, allowed, k, iters, roi):
+    """
+    Geodesic dilation of the seeds inside `allowed` (white & ~edge, precomputed
+    once per panel) with structuring element `k`, until stable or `iters`.
+    """
     x1,y1,x2,y2 = roi
     x1=max(0,x1); y1=max(0,y1)
     S = (slice(y1,y2), slice(x1,x2))
     region = (seeds[S]>0).astype(np.uint8)*255
-    if np.count_nonzero(region)==0: 
+    if cv2.countNonZero(region)==0: 
         return None
-    W = (white[S]>0).astype(np.uint8)*255
-    B = (edge[S]>0).astype(np.uint8)*255  # barrier
+    A = allowed[S]
 
-    k = cv2.getStructuringElement(cv2.MORPH_ELLIPSE,(grow_px,grow_px))
+    # after the first pass region ⊆ A and only grows, so equal counts ⇔ converged;
+    # a region covering the whole window cannot grow further either
+    n_prev = -1
+    full = region.size
     for _ in range(max(1,iters)):
-        prev = region.copy()
         region = cv2.dilate(region,k,1)
-        region = cv2.bitwise_and(region,W)
-        region = cv2.bitwise_and(region, cv2.bitwise_not(B))
-        if np.array_equal(prev,region):
+        region = cv2.bitwise_and(region,A)
+        n = cv2.countNonZero(region)
+        if n==n_prev or n==full:
             break
+        n_prev = n
 
     num,_,stats,_ = cv2.connectedComponentsWithStats(region,8)
     if num<=1: return None
@@ -57,10 +194,37 @@ def _edge_constrained_grow(seeds, white, edge, grow_px, iters, roi):
     return (x1+rx, y1+ry, x1+rx+rw, y1+ry+rh)
 
 # ---------- main ----------
-def detect_bubbles_in_panel(bgr, panel_box, cfg) -> List[Tuple[int,int,int,int]]:
+def detect_bubbles_page(bgr, panel_boxes, cfg,
+                        priors: Optional[PagePriors] = None) -> List[Tuple[int,int,int,int]]:
+    """
+    Bubbles for every panel on a page; the page gray is computed once.
+    Panels run on a thread pool (cv2 releases the GIL in MSER/morphology/CCL)
+    sized by cv2.getNumThreads(), so process-pool workers pinned to 1 OpenCV
+    thread stay sequential; results keep panel order.
+    """
+    if priors is None:
+        priors = PagePriors(bgr)
+    workers = min(len(panel_boxes), max(1, cv2.getNumThreads()))
+    if workers <= 1:
+        per_panel = [detect_bubbles_in_panel(bgr, p, cfg, priors=priors) for p in panel_boxes]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            per_panel = list(ex.map(lambda p: detect_bubbles_in_panel(bgr, p, cfg, priors=priors), panel_boxes))
+    out = []
+    for boxes in per_panel:
+        out.extend(boxes)
+    return out
+
+def detect_bubbles_in_panel(bgr, panel_box, cfg,
+                            priors: Optional[PagePriors] = None) -> List[Tuple[int,int,int,int]]:
     x0,y0,w0,h0 = panel_box
-    roi = bgr[y0:y0+h0, x0:x0+w0]
-    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    if priors is None:
+        # standalone call: gray over the panel only
+        priors = PagePriors(bgr[y0:y0+h0, x0:x0+w0])
+        box = (0, 0, w0, h0)
+    else:
+        box = (x0, y0, w0, h0)
+    gray = priors.crop(box)
     H,W = gray.shape[:2]
 
     # scale to panel size
@@ -81,45 +245,50 @@ def detect_bubbles_in_panel(bgr, panel_box, cfg) -> List[Tuple[int,int,int,int]]
     min_sol    = float(cfg.get("bubble_min_solidity",0.50))
 
     # priors
-    white_thr = np.percentile(gray, white_pct)
+    white_thr = _percentile(gray, white_pct)
     white = (gray >= white_thr).astype(np.uint8)*255
-    var = _local_variance(gray, vw)
-    var_thr = np.percentile(var, var_pct)
+    var = priors.var(box, vw)
+    var_thr = _percentile(var, var_pct)
     smooth = (var <= var_thr).astype(np.uint8)*255
     prior = cv2.bitwise_and(white, smooth)
 
     # edges (balloon rim)
-    edge = cv2.Canny(gray, 70, 160)
-    edge = cv2.dilate(edge, cv2.getStructuringElement(cv2.MORPH_ELLIPSE,(3,3)),1)
+    edge = priors.edge(box)
+
+    # grow mask: whiteness prior minus edge barrier
+    allowed = cv2.bitwise_and(prior, cv2.bitwise_not(edge))
+    grow_px = max(5,int(5*s))
+    grow_k = morph.kernel(cv2.MORPH_ELLIPSE, grow_px)
 
     # --- multi-contrast maps to pop text ---
     ksz = max(9, int(15*s))
-    K = cv2.getStructuringElement(cv2.MORPH_RECT,(ksz,ksz))
-    tophat = cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, K)   # bright-on-dark
-    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, K)# dark-on-bright
+    tophat = priors.tophat(box, ksz)     # bright-on-dark
+    blackhat = priors.blackhat(box, ksz) # dark-on-bright
     inv_top = 255 - tophat
     inv_blk = 255 - blackhat
 
     # --- multi-scale MSER seeding (small + large letters) ---
+    # Two passes on purpose: one MSER over a stacked blk/top composite with the
+    # union area range is slower (more candidate regions) and not equivalent.
     def mser_boxes(img, amin, amax, delta):
         try:
             m = cv2.MSER_create(); m.setDelta(delta); m.setMinArea(amin); m.setMaxArea(amax)
         except Exception:
             m = cv2.MSER_create(delta, amin, amax)
-        regs,_ = m.detectRegions(img)
-        return [cv2.boundingRect(r.reshape(-1,1,2)) for r in regs]
+        _,bboxes = m.detectRegions(img)   # (N,4) x,y,w,h, same as boundingRect per region
+        return [tuple(b) for b in np.asarray(bboxes).reshape(-1,4).tolist()]
 
     amin_base = int(round(cfg.get("mser_min_area",18)*(s**2)))
     amax_base = int(round(cfg.get("mser_max_area",20000)*(s**2)))
     small = mser_boxes(inv_blk, max(8, int(0.5*amin_base)), int(0.4*amax_base), int(cfg.get("mser_delta",5)))
     large = mser_boxes(inv_top, int(0.3*amax_base), amax_base, int(cfg.get("mser_delta",5)))
 
-    seeds = np.zeros_like(gray, dtype=np.uint8)
-    for x,y,w,h in small+large:
-        cv2.rectangle(seeds,(x,y),(x+w,y+h),255,-1)
+    seeds = fill_rects(gray.shape, small+large, inclusive=True)
 
     # group seeds so each cluster ≈ one bubble
-    grouped = cv2.dilate(seeds, cv2.getStructuringElement(cv2.MORPH_RECT,(merge_px,merge_px)),1)
+    # (a rect dilate is separable in OpenCV and beats distanceTransform(DIST_C)
+    #  + threshold by 3-8x even at merge_px≈145, so it stays a plain dilate)
+    grouped = cv2.dilate(seeds, morph.kernel(cv2.MORPH_RECT, merge_px),1)
 
     # grow each cluster within a local window
     cand_xyxy=[]
@@ -132,7 +301,7 @@ def detect_bubbles_in_panel(bgr, panel_box, cfg) -> List[Tuple[int,int,int,int]]
         x1=max(0,x-expand); y1=max(0,y-expand)
         x2=min(W,x+w+expand); y2=min(H,y+h+expand)
 
-        grown = _edge_constrained_grow(seeds, prior, edge, max(5,int(5*s)), iters, (x1,y1,x2,y2))
+        grown = _edge_constrained_grow(seeds, allowed, grow_k, iters, (x1,y1,x2,y2))
         if grown is None: 
             continue
         gx1,gy1,gx2,gy2 = grown
@@ -144,15 +313,16 @@ def detect_bubbles_in_panel(bgr, panel_box, cfg) -> List[Tuple[int,int,int,int]]
     # fallback: outline-only (rarely needed now)
     if not cand_xyxy:
         e = cv2.Canny(gray, 60, 150)
-        e = cv2.morphologyEx(e, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_ELLIPSE,(5,5)),1)
+        e = cv2.morphologyEx(e, cv2.MORPH_CLOSE, morph.kernel(cv2.MORPH_ELLIPSE, 5),1)
         cnts,_ = cv2.findContours(e, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        bright_thr = _percentile(gray, 70) if cnts else 0.0
         for c in cnts:
             x,y,w,h = cv2.boundingRect(c)
             if w*h < min_area or w*h > max_area: continue
             hull = cv2.convexHull(c)
             sol = (cv2.contourArea(c)+1e-6)/(cv2.contourArea(hull)+1e-6)
             if sol < min_sol: continue
-            if float(np.mean(gray[y:y+h, x:x+w])) < np.percentile(gray, 70):
+            if float(np.mean(gray[y:y+h, x:x+w])) < bright_thr:
                 continue
             cand_xyxy.append((x,y,x+w,y+h))
 
@@ -0,0 +1,20 @@
+# src/detectors/morph.py
+
+"""
+Shared morphology helpers.
+Structuring elements depend only on (shape, size), so they are built once and
+reused across panels and pages. The cached arrays are read-only.
+"""
+
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+
+@lru_cache(maxsize=64)
+def kernel(shape: int, kx: int, ky: int = 0) -> np.ndarray:
+    """cv2.getStructuringElement(shape, (kx, ky or kx)), cached."""
+    k = cv2.getStructuringElement(shape, (int(kx), int(ky or kx)))
+    k.setflags(write=False)
+    return k
@@ -1,7 +1,31 @@
 # src/export/jsonl_writer.py
 import json
-from typing import Iterable, Dict
+from typing import Iterable, Dict, List
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
+
+_ORJSON_OPTS = (orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+def dumps_line(r: Dict) -> bytes:
+    """One JSONL line as UTF-8 bytes (trailing newline included)."""
+    if orjson is not None:
+        return orjson.dumps(r, option=_ORJSON_OPTS)
+    return (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+
+def loads_line(line) -> object:
+    """Parse one JSON document from bytes or str; orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
 def write_jsonl(path: str, records: Iterable[Dict]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        for r in records:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    with open(path, "wb") as f:
+        f.writelines(dumps_line(r) for r in records)
+
+def read_jsonl(path: str) -> List[Dict]:
+    """All non-blank lines of a JSONL file; one read, orjson when installed."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return [loads_line(line) for line in data.splitlines() if line.strip()]
@@ -2,10 +2,15 @@
 # Build per-panel JSONL records from your detected boxes + OCR results.
 from __future__ import annotations
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple, Any, Optional
 import cv2
 import numpy as np
 
+from src.common.utils import imwrite
+
+_CROP_PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 3]
+
 def _center(box: Tuple[int,int,int,int]) -> Tuple[float,float]:
     x,y,w,h = box
     return (x + w/2.0, y + h/2.0)
@@ -15,32 +20,38 @@ def _contains(panel_box: Tuple[int,int,int,int], bubble_box: Tuple[int,int,int,i
     bx,by,bw,bh = bubble_box
     return (bx >= px) and (by >= py) and (bx + bw <= px + pw) and (by + bh <= py + ph)
 
-def _y_then_x_key(box: Tuple[int,int,int,int]):
-    x,y,w,h = box
-    return (y, x)
-
-def _crop_and_save(bgr: np.ndarray, box: Tuple[int,int,int,int], out_dir: str, page_index: int, panel_index: int) -> str:
+def _panel_crop(bgr: np.ndarray, box: Tuple[int,int,int,int], out_dir: str, page_index: int, panel_index: int):
+    """Clamped crop view + its output path (does not write)."""
     x,y,w,h = box
     H,W = bgr.shape[:2]
     x = max(0, min(x, W-1)); y = max(0, min(y, H-1))
     w = max(1, min(w, W-x)); h = max(1, min(h, H-y))
-    crop = bgr[y:y+h, x:x+w].copy()
+    crop = bgr[y:y+h, x:x+w]  # view; bgr is not modified while writes are pending
     os.makedirs(out_dir, exist_ok=True)
     out = os.path.join(out_dir, f"page_{page_index:04d}_panel_{panel_index:02d}.png")
-    cv2.imwrite(out, crop)
+    return crop, out
+
+def _crop_and_save(bgr: np.ndarray, box: Tuple[int,int,int,int], out_dir: str, page_index: int, panel_index: int) -> str:
+    crop, out = _panel_crop(bgr, box, out_dir, page_index, panel_index)
+    imwrite(out, crop, _CROP_PNG_PARAMS)
     return out
 
-def _bubble_texts_for_panel(panel_box, bubble_boxes, ocr_res) -> List[str]:
-    """Assign bubbles to panel via containment; order by top->down, left->right; collect OCR text."""
-    pairs = []
-    for i, b in enumerate(bubble_boxes):
-        if _contains(panel_box, b):
-            pairs.append((b, i))
-    # order
-    pairs.sort(key=lambda t: _y_then_x_key(t[0]))
+def _containment(panel_boxes, bubble_boxes) -> np.ndarray:
+    """(P, B) bool: bubble j lies fully inside panel i (same test as _contains)."""
+    P = np.asarray(panel_boxes, dtype=np.int64).reshape(-1, 4)
+    B = np.asarray(bubble_boxes, dtype=np.int64).reshape(-1, 4)
+    return ((B[None,:,0] >= P[:,None,0]) & (B[None,:,1] >= P[:,None,1]) &
+            (B[None,:,0] + B[None,:,2] <= P[:,None,0] + P[:,None,2]) &
+            (B[None,:,1] + B[None,:,3] <= P[:,None,1] + P[:,None,3]))
+
+def _ordered_members(row: np.ndarray, B: np.ndarray) -> List[int]:
+    """Bubble indices set in one containment row, top->down then left->right (stable)."""
+    idx = np.nonzero(row)[0]
+    return idx[np.lexsort((B[idx,0], B[idx,1]))].tolist()
 
+def _texts_for_indices(idxs: List[int], ocr_res) -> List[str]:
     texts = []
-    for _, idx in pairs:
+    for idx in idxs:
         # ocr_res is a list aligned to bubble_boxes order (your ocr_bubbles returns in that order)
         text = ""
         if ocr_res and idx < len(ocr_res):
@@ -54,6 +65,12 @@ def _bubble_texts_for_panel(panel_box, bubble_boxes, ocr_res) -> List[str]:
             texts.append(text)
     return texts
 
+def _bubble_texts_for_panel(panel_box, bubble_boxes, ocr_res) -> List[str]:
+    """Assign bubbles to panel via containment; order by top->down, left->right; collect OCR text."""
+    B = np.asarray(bubble_boxes, dtype=np.int64).reshape(-1, 4)
+    row = _containment([panel_box], B)[0]
+    return _texts_for_indices(_ordered_members(row, B), ocr_res)
+
 def build_panel_records(
     image_path: str,
     page_index: int,
@@ -78,19 +95,32 @@ def build_panel_records(
       }
     """
     recs: List[Dict[str,Any]] = []
-    for i, pbox in enumerate(panel_boxes, start=1):
-        texts = _bubble_texts_for_panel(pbox, bubble_boxes, ocr_res)
-        crop_path = None
-        if save_crops and crops_dir:
-            crop_path = _crop_and_save(bgr, pbox, crops_dir, page_index, i)
+    # one (P, B) containment mask for the whole page
+    B = np.asarray(bubble_boxes, dtype=np.int64).reshape(-1, 4)
+    contain = _containment(panel_boxes, B)
+    # crops encode/write on a small pool (cv2 releases the GIL); joined before returning
+    pool = ThreadPoolExecutor(max_workers=4) if (save_crops and crops_dir) else None
+    futs = []
+    try:
+        for i, pbox in enumerate(panel_boxes, start=1):
+            texts = _texts_for_indices(_ordered_members(contain[i-1], B), ocr_res)
+            crop_path = None
+            if pool is not None:
+                crop, crop_path = _panel_crop(bgr, pbox, crops_dir, page_index, i)
+                futs.append(pool.submit(imwrite, crop_path, crop, _CROP_PNG_PARAMS))
 
-        recs.append({
-            "page_index": page_index,
-            "page_id": page_id,
-            "panel_index": i,
-            "image_path": image_path,
-            "panel_box": list(map(int, pbox)),
-            "panel_crop": crop_path,
-            "bubbles": texts,
-        })
+            recs.append({
+                "page_index": page_index,
+                "page_id": page_id,
+                "panel_index": i,
+                "image_path": image_path,
+                "panel_box": list(map(int, pbox)),
+                "panel_crop": crop_path,
+                "bubbles": texts,
+            })
+        for f in futs:
+            f.result()  # surface write errors
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
     return recs
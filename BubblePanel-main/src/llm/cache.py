@@ -0,0 +1,167 @@
+# src/llm/cache.py
+"""
+On-disk cache for deterministic LLM calls (SQLite).
+
+Key   = sha256 of {kind, model, system, prompt, image sha256, options}
+Value = raw response text
+
+Environment:
+  BUBBLEPANEL_LLM_CACHE        "0" disables the cache (default: enabled)
+  BUBBLEPANEL_CACHE_DIR        directory for llm.sqlite (default: ~/.cache/bubblepanel)
+  BUBBLEPANEL_LLM_CACHE_TTL    seconds before an entry expires (default: 30 days)
+  BUBBLEPANEL_LLM_CACHE_MAX    max entries; least-recently-used are evicted (default: 20000)
+
+Empty responses are never stored, so transient failures are retried next run.
+Identical calls that are in flight at the same time (e.g. two panels with the
+same prompt under the summarizers' thread pool) share one request, with or
+without the disk cache.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+_ENABLED = os.getenv("BUBBLEPANEL_LLM_CACHE", "1") != "0"
+_DIR = os.path.expanduser(os.getenv("BUBBLEPANEL_CACHE_DIR", "~/.cache/bubblepanel"))
+_TTL = int(os.getenv("BUBBLEPANEL_LLM_CACHE_TTL", str(30 * 24 * 3600)))
+_MAX = int(os.getenv("BUBBLEPANEL_LLM_CACHE_MAX", "20000"))
+_EVICT_EVERY = 100  # puts between eviction sweeps
+
+
+class LLMCache:
+    """Thread-safe key/value store on one SQLite connection."""
+
+    def __init__(self, path: str, ttl: int = _TTL, max_entries: int = _MAX):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl, self.max_entries = ttl, max_entries
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = self.misses = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm (key TEXT PRIMARY KEY, value TEXT NOT NULL, ts INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_ts ON llm(ts)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = int(time.time())
+        with self._lock:
+            row = self._db.execute("SELECT value, ts FROM llm WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM llm WHERE key=?", (key,))
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE llm SET ts=? WHERE key=?", (now, key))  # LRU touch
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        now = int(time.time())
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO llm (key, value, ts) VALUES (?, ?, ?)", (key, value, now))
+            self._puts += 1
+            if self._puts % _EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: int) -> None:
+        self._db.execute("DELETE FROM llm WHERE ts < ?", (now - self.ttl,))
+        n = self._db.execute("SELECT COUNT(*) FROM llm").fetchone()[0]
+        if n > self.max_entries:
+            self._db.execute(
+                "DELETE FROM llm WHERE key IN (SELECT key FROM llm ORDER BY ts ASC LIMIT ?)",
+                (n - self.max_entries,),
+            )
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """Process-wide cache, opened on first use; None when disabled or unavailable."""
+    global _cache, _ENABLED
+    if not _ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = LLMCache(os.path.join(_DIR, "llm.sqlite"))
+            except Exception as e:
+                print(f"[llm-cache] disabled: {e}")
+                _ENABLED = False
+                return None
+        return _cache
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_sha(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def image_sha(path: Optional[str]) -> Optional[str]:
+    """sha256 of the file's bytes, memoized per (path, mtime, size)."""
+    if not path:
+        return None
+    st = os.stat(path)
+    return _file_sha(path, st.st_mtime_ns, st.st_size)
+
+
+def cache_key(**parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def cached_llm(kind: str, key_fn: Callable[..., dict]) -> Callable:
+    """
+    Decorator for text-returning LLM calls. `key_fn(*args, **kwargs)` returns
+    the dict of everything that determines the response.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = cache_key(kind=kind, **key_fn(*args, **kwargs))
+            cache = get_cache()
+            if cache is not None:
+                hit = cache.get(key)
+                if hit is not None:
+                    return hit
+            # single-flight: the first caller runs the request, duplicates wait on it
+            with _inflight_lock:
+                fut = _inflight.get(key)
+                owner = fut is None
+                if owner:
+                    fut = _inflight[key] = Future()
+            if not owner:
+                return fut.result()
+            try:
+                out = fn(*args, **kwargs)
+                if out and cache is not None:
+                    cache.put(key, out)
+                fut.set_result(out)
+                return out
+            except BaseException as e:
+                fut.set_exception(e)
+                raise
+            finally:
+                with _inflight_lock:
+                    _inflight.pop(key, None)
+        return wrapper
+    return deco
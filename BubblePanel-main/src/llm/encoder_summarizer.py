@@ -1,44 +1,32 @@
 # src/llm/encoder_summarizer.py
-import json, re, math, torch
+import re, math, torch
+from functools import lru_cache
 from typing import List, Dict
 from pathlib import Path
 
+from src.export.jsonl_writer import read_jsonl as _read_jsonl, write_jsonl
+from src.llm.summarize import _group_panels_by_page
+from src.llm.utils import char_counts
+
 # ---- local, model-light summarizer using encoder-only models ----
 # Dependencies: sentence-transformers, transformers (for optional MLM refiner)
 
 # ----------------- small utils -----------------
 _WORD = re.compile(r"[A-Za-z']{2,}")
-
-def _read_jsonl(path: str) -> List[Dict]:
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                rows.append(json.loads(line))
-    return rows
-
-def _group_panels_by_page(panels: List[Dict]) -> List[Dict]:
-    pages: Dict[str, Dict] = {}
-    for p in panels or []:
-        key = f"{p.get('page_index','')}-{p.get('page_id','')}"
-        if key not in pages:
-            pages[key] = {
-                "page_index": p.get("page_index"),
-                "page_id": p.get("page_id"),
-                "bubbles": [],
-                "panels": [],
-            }
-        pages[key]["panels"].append(p.get("panel_index"))
-        pages[key]["bubbles"].extend(p.get("bubbles", []))
-    return sorted(pages.values(), key=lambda r: (r.get("page_index") or 0))
+_RE_WS = re.compile(r"\s+")
+_RE_NONASCII = re.compile(r"[^\x20-\x7E]{1,}")
+_RE_SENT = re.compile(r"(?<=[.!?…])\s+")
+_RE_MULTI_WS = re.compile(r"\s{2,}")
+_RE_SHORT = re.compile(r"\b[a-z]{1,2}\b")
+# OCR micro-fixes; applied in order (a single alternation would differ on overlaps, e.g. "gmamal'm")
+_FIXES = (("l'm","I'm"), ("gmamal","game"), ("Plaedts","Played"), ("D'as","D' as"))
 
 def _sanitize_sentence(s: str) -> str:
-    s = re.sub(r"\s+", " ", s or "").strip()
+    s = _RE_WS.sub(" ", s or "").strip()
     s = s.replace("..", "…").replace("--", "—")
-    s = re.sub(r"[^\x20-\x7E]{1,}", "", s)  # drop non-ascii artifacts
+    s = _RE_NONASCII.sub("", s)  # drop non-ascii artifacts
     # micro-fixes
-    for a, b in {"l'm":"I'm","gmamal":"game","Plaedts":"Played","D'as":"D' as"}.items():
+    for a, b in _FIXES:
         s = s.replace(a, b)
     return s.strip()
 
@@ -47,8 +35,7 @@ def _clean_soft(lines: List[str]) -> List[str]:
     for t in lines or []:
         s = _sanitize_sentence(t)
         if not s: continue
-        letters = sum(ch.isalpha() for ch in s)
-        non_alnum = sum(1 for ch in s if not (ch.isalnum() or ch.isspace() or ch in ".,?!'\"-…:;()[]"))
+        letters, non_alnum = char_counts(s)
         if letters < 2 or non_alnum / max(1, len(s)) > 0.45:
             continue
         k = s.lower()
@@ -59,7 +46,7 @@ def _clean_soft(lines: List[str]) -> List[str]:
 def _sentences_from_bubbles(bubbles: List[str]) -> List[str]:
     sents = []
     for t in bubbles:
-        parts = re.split(r"(?<=[.!?…])\s+", t)
+        parts = _RE_SENT.split(t)
         for p in parts:
             p = _sanitize_sentence(p)
             if len(p) >= 4:
@@ -71,7 +58,7 @@ def _compose_paragraph(sents: List[str], target_min=90, target_max=140) -> str:
     if len(text) < target_min:
         return text
     if len(text) > target_max:
-        parts = re.split(r"(?<=[.!?…])\s+", text)
+        parts = _RE_SENT.split(text)
         out, cur = [], 0
         for p in parts:
             if cur + len(p) + 1 > target_max: break
@@ -81,9 +68,7 @@ def _compose_paragraph(sents: List[str], target_min=90, target_max=140) -> str:
 
 def _write_jsonl(path: str, rows: List[Dict]):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    write_jsonl(path, rows)
 
 # ----------------- encoder scorer -----------------
 def _rank_sentences(sents: List[str], embeddings) -> List[int]:
@@ -91,10 +76,9 @@ def _rank_sentences(sents: List[str], embeddings) -> List[int]:
     X = embeddings  # (n, d)
     if X.shape[0] == 0:
         return []
-    centroid = X.mean(axis=0, keepdims=True)  # (1, d)
-    # cosine similarity to centroid
-    denom = (np.linalg.norm(X, axis=1) * np.linalg.norm(centroid, axis=1)[0] + 1e-8)
-    cos = (X @ centroid.T)[:, 0] / denom
+    centroid = X.mean(axis=0)  # (d,)
+    # cosine similarity to centroid; rows are unit-norm (normalize_embeddings=True)
+    cos = (X @ centroid) / (np.linalg.norm(centroid) + 1e-8)
     # small position prior (earlier gets slight boost)
     pos_bonus = np.linspace(0.12, 0.0, num=len(sents))
     score = cos + pos_bonus
@@ -111,7 +95,7 @@ def _refine_with_mlm(paragraph: str, mlm_pipeline=None) -> str:
     txt = paragraph
 
     # cheap passes: replace lone weird tokens by mask and fill a few times
-    odd_tokens = re.findall(r"\b[a-z]{1,2}\b", txt)
+    odd_tokens = _RE_SHORT.findall(txt)
     odd_tokens = [t for t in odd_tokens if t not in {"a","i","an","to","of","in","on","it"}]
     odd_tokens = list(dict.fromkeys(odd_tokens))[:4]
     for tok in odd_tokens:
@@ -124,9 +108,16 @@ def _refine_with_mlm(paragraph: str, mlm_pipeline=None) -> str:
             pass
 
     # normalize spaces
-    txt = re.sub(r"\s{2,}", " ", txt).strip()
+    txt = _RE_MULTI_WS.sub(" ", txt).strip()
     return txt
 
+# ----------------- encoder loading -----------------
+@lru_cache(maxsize=2)
+def _load_encoder(name: str, device: str):
+    """One SentenceTransformer per (model, device) for the process lifetime."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name, device=device)
+
 # ----------------- main entry -----------------
 def summarize_pages_encoder(
     jsonl_in: str,
@@ -140,7 +131,6 @@ def summarize_pages_encoder(
     Summarize each page via encoder-only semantic selection; optional MLM polish.
     Writes jsonl with {"page_index","page_id","model":"encoder:<name>","paragraph":...}
     """
-    from sentence_transformers import SentenceTransformer
     from transformers import pipeline as hf_pipeline, AutoModelForMaskedLM, AutoTokenizer
 
     panels = _read_jsonl(jsonl_in)
@@ -150,22 +140,38 @@ def summarize_pages_encoder(
     if device is None:
         device = "cuda" if torch.cuda.is_available() else "cpu"
 
-    encoder = SentenceTransformer(embed_model_name, device=device)
+    encoder = _load_encoder(embed_model_name, device)
     mlm = None
     if use_mlm_refiner:
         tok = AutoTokenizer.from_pretrained(mlm_model_name)
         mdl = AutoModelForMaskedLM.from_pretrained(mlm_model_name)
         mlm = hf_pipeline("fill-mask", model=mdl, tokenizer=tok, top_k=1, device=0 if device == "cuda" else -1)
 
-    out = []
+    # clean every page first, then embed all sentences in one batched call
+    cleaned = []
+    all_sents: List[str] = []
+    offsets = [0]
     for page in pages:
         bubbles = _clean_soft(page.get("bubbles", []))
         sents = _sentences_from_bubbles(bubbles)
+        cleaned.append((bubbles, sents))
+        all_sents.extend(sents)
+        offsets.append(len(all_sents))
+
+    all_emb = None
+    if all_sents:
+        with torch.inference_mode():
+            all_emb = encoder.encode(all_sents, batch_size=64, convert_to_numpy=True,
+                                     normalize_embeddings=True, show_progress_bar=False)
+
+    out = []
+    for i, page in enumerate(pages):
+        bubbles, sents = cleaned[i]
         if not sents:
             out.append({**page, "model": f"encoder:{embed_model_name}", "paragraph": "", "ordered_bubbles_text": bubbles})
             continue
 
-        embeddings = encoder.encode(sents, convert_to_numpy=True, normalize_embeddings=True)
+        embeddings = all_emb[offsets[i]:offsets[i + 1]]
         keep_idxs = _rank_sentences(sents, embeddings)
         chosen = [sents[i] for i in keep_idxs]
         paragraph = _compose_paragraph(chosen, target_min=90, target_max=140)
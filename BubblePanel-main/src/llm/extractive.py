@@ -1,15 +1,21 @@
 # src/llm/extractive.py
-import json, math, re
+import json, re
 from typing import Dict, List
+
+import numpy as np
 from src.export.jsonl_writer import write_jsonl
 from src.llm.summarize import _read_jsonl, _group_panels_by_page
+from src.llm.utils import char_counts
 
 _WORD = re.compile(r"[A-Za-z']{2,}")
+_RE_WS = re.compile(r"\s+")
+_RE_NONASCII = re.compile(r"[^\x20-\x7E]{1,}")
+_RE_SENT = re.compile(r"(?<=[.!?…])\s+")
 
 def _sanitize(s: str) -> str:
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_WS.sub(" ", s).strip()
     s = s.replace("..", "…").replace("--", "—")
-    s = re.sub(r"[^\x20-\x7E]{1,}", "", s)
+    s = _RE_NONASCII.sub("", s)
     return s
 
 def _clean_soft(lines: List[str]) -> List[str]:
@@ -17,8 +23,7 @@ def _clean_soft(lines: List[str]) -> List[str]:
     for t in lines or []:
         s = _sanitize(t or "")
         if not s: continue
-        letters = sum(ch.isalpha() for ch in s)
-        non_alnum = sum(1 for ch in s if not (ch.isalnum() or ch.isspace() or ch in ".,?!'\"-…:;()[]"))
+        letters, non_alnum = char_counts(s)
         if letters < 2 or non_alnum / max(1, len(s)) > 0.45:
             continue
         k = s.lower()
@@ -30,40 +35,37 @@ def _sent_split(texts: List[str]) -> List[str]:
     # treat each bubble as a sentence; also split on obvious end marks
     sents = []
     for t in texts:
-        parts = re.split(r"(?<=[.!?…])\s+", t)
+        parts = _RE_SENT.split(t)
         for p in parts:
             p = _sanitize(p)
             if len(p) >= 4:
                 sents.append(p)
     return sents
 
-def _tf(sent: str) -> Dict[str, float]:
-    words = [w.lower() for w in _WORD.findall(sent)]
-    n = len(words) or 1
-    d = {}
-    for w in words:
-        d[w] = d.get(w, 0) + 1.0 / n
-    return d
-
-def _idf(corpus: List[List[str]]) -> Dict[str, float]:
-    df = {}
-    for words in corpus:
-        for w in set(words):
-            df[w] = df.get(w, 0) + 1
-    N = len(corpus) or 1
-    return {w: math.log((N + 1) / (df[w] + 0.5)) + 1.0 for w in df}
-
 def _score_sentences(sents: List[str]) -> List[float]:
-    corp = [[w.lower() for w in _WORD.findall(s)] for s in sents]
-    idf = _idf(corp)
-    scores = []
-    for s, words in zip(sents, corp):
-        tf = {}
-        for w in words:
-            tf[w] = tf.get(w, 0) + 1.0 / (len(words) or 1)
-        score = sum(tf[w] * idf.get(w, 1.0) for w in tf)
-        scores.append(score)
-    return scores
+    """
+    TF-IDF sentence scores, vectorized over the page: tokens become int ids
+    once, DF comes from unique (sentence, token) pairs, and since
+    Σ_w tf(w)·idf(w) = Σ_tokens idf(tok) / n, each score is one bincount.
+    """
+    if not sents:
+        return []
+    vocab: Dict[str, int] = {}
+    tok_ids: List[int] = []
+    lens: List[int] = []
+    for s in sents:
+        words = _WORD.findall(s)
+        lens.append(len(words))
+        tok_ids.extend(vocab.setdefault(w.lower(), len(vocab)) for w in words)
+    S, V = len(sents), max(1, len(vocab))
+    lens_a = np.asarray(lens, dtype=np.int64)
+    tok = np.asarray(tok_ids, dtype=np.int64)
+    sent = np.repeat(np.arange(S, dtype=np.int64), lens_a)
+
+    df = np.bincount(np.unique(sent * V + tok) % V, minlength=V)
+    idf = np.log((S + 1) / (df + 0.5)) + 1.0
+    tot = np.bincount(sent, weights=idf[tok], minlength=S)
+    return (tot / np.maximum(lens_a, 1)).tolist()
 
 def _select_indices(scores: List[float], k: int) -> List[int]:
     idxs = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
@@ -76,7 +78,7 @@ def _compose_paragraph(sents: List[str], target_min=90, target_max=140) -> str:
         return text
     if len(text) > target_max:
         # truncate at sentence boundary
-        parts = re.split(r"(?<=[.!?…])\s+", text)
+        parts = _RE_SENT.split(text)
         out, cur = [], 0
         for p in parts:
             if cur + len(p) + 1 > target_max: break
@@ -1,32 +1,61 @@
 # src/llm/ollama_client.py
 # Minimal, robust Ollama client helpers for text (generate) and chat with optional image.
 # No temperature/stream kwargs; return raw text. Callers handle JSON parsing.
+# Responses are memoized on disk (see src/llm/cache.py; BUBBLEPANEL_LLM_CACHE=0 disables).
 
-import json
 import base64
+import os
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
+from src.export.jsonl_writer import loads_line
+from src.llm.cache import cached_llm, image_sha
+
+# Requests in flight at once from the summarizers (see summarize._map_llm).
+LLM_CONCURRENCY = max(1, int(os.getenv("BUBBLEPANEL_LLM_CONCURRENCY", "8")))
+
+# One pooled keep-alive session for every call (no TCP handshake per page).
+# The pool holds a connection per concurrent request, so none get discarded
+# and re-opened when every summarizer thread is busy.
+_SESSION = requests.Session()
+_POOL = max(16, LLM_CONCURRENCY)
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=_POOL))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=_POOL))
+
+# Sampling options sent with every call (also part of the response-cache key)
+_OPTIONS = {
+    "num_predict": 300,
+    "top_p": 0.9,
+    "repeat_penalty": 1.1,
+}
+
 def _post_json(host: str, path: str, payload: dict) -> dict:
     url = host.rstrip("/") + path
-    resp = requests.post(url, json=payload, timeout=600)
+    resp = _SESSION.post(url, json=payload, timeout=600)
     resp.raise_for_status()
-    # Ollama /api/generate streams by default unless stream=false; response may be one or many JSON lines
-    text = resp.text.strip()
-    if not text:
+    if not resp.content:
         return {}
-    # Try parse last JSON object if streamed
+    # stream=false → a single JSON object
+    try:
+        obj = loads_line(resp.content)
+        return obj if isinstance(obj, dict) else {}
+    except ValueError:
+        pass
+    # Fallback: server streamed anyway (NDJSON); keep the last parseable object
     last = None
-    for line in text.splitlines():
+    for line in resp.content.splitlines():
         line = line.strip()
         if not line:
             continue
         try:
-            last = json.loads(line)
+            last = loads_line(line)
         except Exception:
             pass
     return last or {}
 
+@cached_llm("generate", lambda host, model, system, prompt:
+            {"model": model, "system": system, "prompt": prompt, "options": _OPTIONS})
 def generate(host: str, model: str, system: str, prompt: str) -> str:
     """
     Call /api/generate in non-stream mode.
@@ -38,15 +67,14 @@ def generate(host: str, model: str, system: str, prompt: str) -> str:
         "prompt": prompt,
         "stream": False,
         # modest limits for latency; adjust if needed
-        "options": {
-            "num_predict": 300,
-            "top_p": 0.9,
-            "repeat_penalty": 1.1
-        }
+        "options": _OPTIONS,
     }
     obj = _post_json(host, "/api/generate", payload)
     return (obj.get("response") or "").strip()
 
+@cached_llm("chat", lambda host, model, system, user_text, image_path=None:
+            {"model": model, "system": system, "prompt": user_text,
+             "image_sha": image_sha(image_path), "options": _OPTIONS})
 def chat_vlm(host: str, model: str, system: str, user_text: str, image_path: Optional[str] = None) -> str:
     """
     Call /api/chat. If image_path is None, sends text-only messages.
@@ -70,11 +98,7 @@ def chat_vlm(host: str, model: str, system: str, user_text: str, image_path: Opt
         "model": model,
         "messages": messages,
         "stream": False,
-        "options": {
-            "num_predict": 300,
-            "top_p": 0.9,
-            "repeat_penalty": 1.1
-        }
+        "options": _OPTIONS,
     }
     obj = _post_json(host, "/api/chat", payload)
     # /api/chat non-stream returns {"message":{"content":"..."}}
@@ -2,10 +2,13 @@
 import json
 import os
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 
-from src.export.jsonl_writer import write_jsonl
-from src.llm.ollama_client import generate, chat_vlm
+from src.export.jsonl_writer import loads_line, read_jsonl, write_jsonl
+from src.llm.cache import get_cache
+from src.llm.ollama_client import LLM_CONCURRENCY, generate, chat_vlm
+from src.llm.utils import alpha_ratio, ascii_ratio, char_class_counts
 from src.llm.prompts import (
     SYSTEM_TEXT, USER_TEXT_TEMPLATE, SYSTEM_VLM, USER_VLM_TEMPLATE,
     PARA_SYSTEM_TEXT, PARA_USER_TEXT_TEMPLATE, PARA_SYSTEM_VLM, PARA_USER_VLM_TEMPLATE,
@@ -17,43 +20,52 @@ FALLBACK_TEXT_MODEL = os.getenv("BUBBLEPANEL_TEXT_LLM", "qwen2.5:7b-instruct")
 
 # ---------------- Utilities ----------------
 
+# compiled once at import
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.S)
+_WS_RE = re.compile(r"\s+")
+_CTRL_RE = re.compile(r"[^\x20-\x7E]{1,}")
+_REPEAT_RE = re.compile(r"\b(\w.+?)(?:\s*,?\s*\1\b)+", re.I)
+_CLAUSE_RE = re.compile(r"[A-Za-z]{3,}.*[A-Za-z]{2,}")
+_QUOTED_RE = re.compile(r'"([^"]{1,260})"')
+_SPEAKER_RE = re.compile(r'^Speaker\s+\d+:\s*"(.+)"\s*$')
+_SPEAKER_PREFIX_RE = re.compile(r"^Speaker\s+\d+:\s*")
+_MULTISPACE_RE = re.compile(r"\s{2,}")
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+")
+_BAD_QC_RE = re.compile(r"[‘’“”]|…{3,}|_{2,}|[^\x20-\x7E]")
+_WORD3_RE = re.compile(r"[a-z]{3,}")
+_MICRO_FIXES = (("l'm", "I'm"), ("gmamal", "game"), ("Plaedts", "Played"), ("D'as", "D' as"))
+
 def _read_jsonl(path: str) -> List[Dict]:
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                rows.append(json.loads(line))
-    return rows
+    return read_jsonl(path)
 
 def _safe_json(text: str) -> Dict:
-    m = re.search(r"\{.*\}", text or "", flags=re.S)
-    if m:
+    t = (text or "").strip()
+    # usual case: the whole reply is the object, so skip the greedy DOTALL scan
+    if t[:1] == "{" and t[-1:] == "}":
+        block = t
+    else:
+        m = _JSON_OBJ_RE.search(t)
+        block = m.group(0) if m else None
+    if block is not None:
         try:
-            return json.loads(m.group(0))
+            return loads_line(block)
         except Exception:
             pass
-    return {"warnings": ["model_return_not_json"], "raw": (text or "").strip()}
-
-def _ascii_ratio(s: str) -> float:
-    if not s:
-        return 1.0
-    ascii_chars = sum(1 for ch in s if ord(ch) < 128)
-    return ascii_chars / len(s)
-
-def _alpha_ratio(s: str) -> float:
-    if not s:
-        return 0.0
-    return sum(ch.isalpha() for ch in s) / len(s)
+        try:
+            return json.loads(block)  # stdlib is more lenient (NaN, lone surrogates)
+        except Exception:
+            pass
+    return {"warnings": ["model_return_not_json"], "raw": t}
 
 def _sanitize_sentence(s: str) -> str:
     # collapse whitespace and dots
-    s = re.sub(r"\s+", " ", s)
-    s = s.replace("..", "…").replace("— —", "—").strip()
-    # remove stray non-ascii control chunks
-    s = re.sub(r"[^\x20-\x7E]{1,}", "", s)
+    s = _WS_RE.sub(" ", s)
+    s = s.replace("..", "…").replace("— —", "—")
+    # remove stray non-ascii control chunks (skipped when already printable ASCII)
+    if not (s.isascii() and s.isprintable()):
+        s = _CTRL_RE.sub("", s)
     # micro-fixes
-    for a, b in {"l'm":"I'm","gmamal":"game","Plaedts":"Played","D'as":"D' as"}.items():
+    for a, b in _MICRO_FIXES:
         s = s.replace(a, b)
     return s.strip()
 
@@ -64,16 +76,14 @@ def _clean_bubbles(bubbles: List[str]) -> List[str]:
         s = _sanitize_sentence((t or "").strip())
         if not s:
             continue
-        letters = sum(ch.isalpha() for ch in s)
-        non_alnum = sum(1 for ch in s if not (ch.isalnum() or ch.isspace() or ch in ".,?!'\"-…:;()[]"))
+        letters, digits, non_alnum = char_class_counts(s)
         if letters < 3 or non_alnum / max(1, len(s)) > 0.35:
             continue
         # numeric-heavy junk like "11.1 SO"
-        digits = sum(ch.isdigit() for ch in s)
         if digits >= 3 and digits / len(s) > 0.25:
             continue
         # trim repeated clauses
-        s = re.sub(r"\b(\w.+?)(?:\s*,?\s*\1\b)+", r"\1", s, flags=re.I)
+        s = _REPEAT_RE.sub(r"\1", s)
         key = s.lower()
         if key == prev:
             continue
@@ -88,8 +98,7 @@ def _clean_bubbles_soft(bubbles: List[str]) -> List[str]:
         s = _sanitize_sentence((t or "").strip())
         if not s:
             continue
-        letters = sum(ch.isalpha() for ch in s)
-        non_alnum = sum(1 for ch in s if not (ch.isalnum() or ch.isspace() or ch in ".,?!'\"-…:;()[]"))
+        letters, _, non_alnum = char_class_counts(s)
         if letters < 2 or non_alnum / max(1, len(s)) > 0.45:
             continue
         key = s.lower()
@@ -119,19 +128,20 @@ def _assign_speakers(lines: List[str]) -> List[str]:
 
 _BAD_TOKENS = {"uegetabile", "p!p", "tomoTrow", "SO...", "a |", "DN", "el"}
 _BAD_PAT = re.compile(r"(?:[^\w\s'\",.!?\-\u2013\u2014]|_{2,}|\d{3,})")
+# bad tokens and bad chars in one search over the lowercased quote; lowercasing
+# leaves _BAD_PAT's classes unchanged since quotes are ASCII after sanitizing
+_BAD_QUOTE_RE = re.compile("|".join(re.escape(t.lower()) for t in sorted(_BAD_TOKENS)) + "|" + _BAD_PAT.pattern)
 
 def _is_valid_quote(q: str) -> bool:
     q = _sanitize_sentence(q or "")
     if not (4 <= len(q) <= 160):
         return False
-    if _alpha_ratio(q) < 0.65:
-        return False
-    if _BAD_PAT.search(q):
+    if alpha_ratio(q) < 0.65:
         return False
-    if any(bad.lower() in q.lower() for bad in _BAD_TOKENS):
+    if _BAD_QUOTE_RE.search(q.lower()):
         return False
     # must look like a clause, not a label
-    if not re.search(r"[A-Za-z]{3,}.*[A-Za-z]{2,}", q):
+    if not _CLAUSE_RE.search(q):
         return False
     return True
 
@@ -150,16 +160,16 @@ def _valid_quotes_from_lines(lines: List[str]) -> List[str]:
     return uniq[:4]
 
 def _extract_quotes(paragraph: str) -> List[str]:
-    return re.findall(r'"([^"]{1,260})"', paragraph or "")
+    return _QUOTED_RE.findall(paragraph or "")
 
 def _cleaned_text_variants(cleaned_dialogue: List[str]) -> List[str]:
     allowed = []
     for line in cleaned_dialogue or []:
-        m = re.search(r'^Speaker\s+\d+:\s*"(.+)"\s*$', line)
+        m = _SPEAKER_RE.search(line)
         if m:
             allowed.append(m.group(1).strip())
         else:
-            s = re.sub(r"^Speaker\s+\d+:\s*", "", line).strip().strip('"')
+            s = _SPEAKER_PREFIX_RE.sub("", line).strip().strip('"')
             if s:
                 allowed.append(s)
     uniq, seen = [], set()
@@ -170,34 +180,35 @@ def _cleaned_text_variants(cleaned_dialogue: List[str]) -> List[str]:
     return uniq
 
 def _strip_unverified_quotes(paragraph: str, allowed_quotes: List[str]) -> Tuple[str, List[str]]:
-    allowed_set = {q for q in allowed_quotes}
+    allowed_set = set(allowed_quotes)
     used: List[str] = []
-    def repl(m):
-        q = m.group(1)
+    # split() with the capture group yields [text, quote, text, quote, ..., text]
+    # in one C call; the quotes sit at the odd indices
+    parts = _QUOTED_RE.split(paragraph or "")
+    for i in range(1, len(parts), 2):
+        q = parts[i]
         if q in allowed_set:
             used.append(q)
-            return f'"{q}"'
-        return q
-    new_para = re.sub(r'"([^"]{1,260})"', repl, paragraph or "")
-    new_para = re.sub(r"\s{2,}", " ", new_para).strip()
+            parts[i] = f'"{q}"'
+    new_para = _MULTISPACE_RE.sub(" ", "".join(parts)).strip()
     return new_para, used
 
 def _sanitize_paragraph_block(p: str) -> str:
     # remove sentences that look corrupted
-    sents = re.split(r"(?<=[.!?…])\s+", p or "")
+    sents = _SENT_SPLIT_RE.split(p or "")
     good = []
     for s in sents:
         s0 = _sanitize_sentence(s)
         if not s0:
             continue
-        if _alpha_ratio(s0) < 0.6:
+        if alpha_ratio(s0) < 0.6:
             continue
         if _BAD_PAT.search(s0):
             continue
         good.append(s0)
     text = " ".join(good).strip()
     # normalize spaces and quotes
-    text = re.sub(r"\s{2,}", " ", text)
+    text = _MULTISPACE_RE.sub(" ", text)
     return text
 
 def _quality_bad(paragraph: str, cleaned_dialogue: List[str]) -> bool:
@@ -206,13 +217,17 @@ def _quality_bad(paragraph: str, cleaned_dialogue: List[str]) -> bool:
     s = paragraph.strip()
     if len(s) < 140 or len(s) > 1600:
         return True
-    if _ascii_ratio(s) < 0.9:
-        return True
-    if re.search(r"[‘’“”]|…{3,}|_{2,}|[^\x20-\x7E]", s):
+    if s.isascii() and s.isprintable():
+        # usual case: _finalize_paragraph output is printable ASCII already,
+        # so of the char checks below only the "__" run can still hit
+        if "__" in s:
+            return True
+    elif ascii_ratio(s) < 0.9 or _BAD_QC_RE.search(s):
         return True
     dlg = " ".join(cleaned_dialogue).lower()
-    common = sum(1 for w in set(re.findall(r"[a-z]{3,}", s.lower())) if w in dlg)
-    vocab = max(1, len(set(re.findall(r"[a-z]{3,}", s.lower()))))
+    words = set(_WORD3_RE.findall(s.lower()))
+    common = sum(1 for w in words if w in dlg)
+    vocab = max(1, len(words))
     if vocab > 0 and (common / vocab) > 0.9:
         return True
     return False
@@ -222,31 +237,57 @@ def _repair_paragraph(host: str, model: str, cleaned_dialogue: List[str], draft:
     user = REPAIR_USER_TEMPLATE.format(joined=joined, draft=draft)
     fixed = generate(host=host, model=model, system=REPAIR_SYSTEM, prompt=user)
     fixed = (fixed or "").strip()
-    if len(fixed) >= 160 and _ascii_ratio(fixed) >= 0.95:
+    if len(fixed) >= 160 and ascii_ratio(fixed) >= 0.95:
         return fixed
     return draft
 
+class _PageGroups(dict):
+    """(page_index, page_id) -> page record; like defaultdict, but the factory sees the key."""
+    def __missing__(self, key: Tuple) -> Dict:
+        page = self[key] = {"page_index": key[0], "page_id": key[1], "bubbles": [], "panels": []}
+        return page
+
 def _group_panels_by_page(panels: List[Dict]) -> List[Dict]:
-    pages: Dict[str, Dict] = {}
+    pages = _PageGroups()
     for p in panels or []:
-        key = f"{p.get('page_index','')}-{p.get('page_id','')}"
-        if key not in pages:
-            pages[key] = {
-                "page_index": p.get("page_index"),
-                "page_id": p.get("page_id"),
-                "bubbles": [],
-                "panels": [],
-            }
-        pages[key]["panels"].append(p.get("panel_index"))
-        pages[key]["bubbles"].extend(p.get("bubbles", []))
+        page = pages[(p.get("page_index"), p.get("page_id"))]
+        page["panels"].append(p.get("panel_index"))
+        page["bubbles"].extend(p.get("bubbles", []))
     return sorted(pages.values(), key=lambda r: (r.get("page_index") or 0))
 
+def _map_llm(fn: Callable, items: Iterable, concurrency: int = None) -> Iterator:
+    """
+    Apply `fn` (one panel/page → one output record, LLM calls included) with
+    up to `concurrency` requests in flight. Records are yielded in input order
+    as soon as each is ready, so write_jsonl streams them to disk instead of
+    holding the whole chapter. Default: BUBBLEPANEL_LLM_CONCURRENCY (8).
+    """
+    items = list(items)
+    cache = get_cache()
+    before = (cache.hits, cache.misses) if cache else (0, 0)
+    n = min(len(items), concurrency or LLM_CONCURRENCY)
+    if n <= 1:
+        for it in items:
+            yield fn(it)
+    else:
+        ex = ThreadPoolExecutor(max_workers=n, thread_name_prefix="llm")
+        try:
+            yield from ex.map(fn, items)
+        except BaseException:
+            # first failure, Ctrl-C or an abandoned consumer: drop queued pages
+            # instead of running them all
+            ex.shutdown(wait=False, cancel_futures=True)
+            raise
+        ex.shutdown()
+    if cache and (cache.hits, cache.misses) != before:
+        print(f"[llm-cache] {cache.hits - before[0]} hits, {cache.misses - before[1]} misses")
+
 # ---------------- PANEL LEVEL (short) ----------------
 
 def summarize_text_jsonl(jsonl_in: str, jsonl_out: str, model: str, host: str):
     panels = _read_jsonl(jsonl_in)
-    out = []
-    for p in panels:
+
+    def _one(p: Dict) -> Dict:
         payload = {
             "page_index": p.get("page_index"),
             "panel_index": p.get("panel_index"),
@@ -254,14 +295,15 @@ def summarize_text_jsonl(jsonl_in: str, jsonl_out: str, model: str, host: str):
         }
         user = USER_TEXT_TEMPLATE.format(payload=json.dumps(payload, ensure_ascii=False))
         js = _safe_json(generate(host=host, model=model, system=SYSTEM_TEXT, prompt=user))
-        out.append({
+        return {
             **p,
             "summary_text_model": model,
             "summary_text": js.get("panel_summary", js.get("raw", "")),
             "ordered_bubbles_text": js.get("ordered_bubbles", p.get("bubbles", [])),
             "warnings_text": js.get("warnings", []),
-        })
-    write_jsonl(jsonl_out, out)
+        }
+
+    write_jsonl(jsonl_out, _map_llm(_one, panels))
 
 def summarize_vlm_jsonl(jsonl_in: str, jsonl_out: str, model: str, host: str, use_image: bool = True):
     """
@@ -271,8 +313,8 @@ def summarize_vlm_jsonl(jsonl_in: str, jsonl_out: str, model: str, host: str, us
     This keeps behavior consistent with --vlm-no-image in smoke_test.py.
     """
     panels = _read_jsonl(jsonl_in)
-    out = []
-    for p in panels:
+
+    def _one(p: Dict) -> Dict:
         # Build a plain text prompt from bubbles
         joined = "\n".join(f"{i+1}) {t}" for i, t in enumerate(p.get("bubbles", [])))
         user = USER_VLM_TEMPLATE.format(joined=joined)
@@ -292,15 +334,15 @@ def summarize_vlm_jsonl(jsonl_in: str, jsonl_out: str, model: str, host: str, us
             )
         )
 
-        out.append({
+        return {
             **p,
             "summary_vlm_model": model,
             "summary_vlm": js.get("panel_summary", js.get("raw", "")),
             "ordered_bubbles_vlm": js.get("ordered_bubbles", p.get("bubbles", [])),
             "warnings_vlm": js.get("warnings", []),
-        })
+        }
 
-    write_jsonl(jsonl_out, out)
+    write_jsonl(jsonl_out, _map_llm(_one, panels))
 
 # ---------------- PAGE LEVEL (paragraph mode w/ dialog filter) ----------------
 
@@ -332,31 +374,32 @@ def _finalize_paragraph(paragraph: str, cleaned_dialogue: List[str], allow_quote
             def repl(m):
                 q = m.group(1)
                 return f'"{q}"' if q in keep else q
-            paragraph = re.sub(r'"([^"]{1,260})"', repl, paragraph)
+            paragraph = _QUOTED_RE.sub(repl, paragraph)
             used = used[:2]
         return paragraph, used
     else:
         # Remove any quoted text marks entirely (keep inner text)
-        paragraph = re.sub(r'"([^"]{1,260})"', r"\1", paragraph)
+        paragraph = _QUOTED_RE.sub(r"\1", paragraph)
         return paragraph, []
 
 def summarize_text_pages(jsonl_in: str, jsonl_out: str, model: str, host: str):
     panels = _read_jsonl(jsonl_in)
     pages = _group_panels_by_page(panels)
-    out = []
-    for page in pages:
+
+    def _one(page: Dict) -> Dict:
         bubbles = _clean_bubbles_soft(page["bubbles"])
         payload = _paragraph_payload(page, bubbles)
         user = PARA_USER_TEXT_TEMPLATE.format(payload=json.dumps(payload, ensure_ascii=False))
         js = _safe_json(generate(host=host, model=model, system=PARA_SYSTEM_TEXT, prompt=user))
         raw_para = js.get("paragraph", js.get("raw", "")).strip()
 
-        paragraph, used = _finalize_paragraph(raw_para, _assign_speakers(bubbles), payload["allow_quotes"], payload["valid_quotes"])
-        if _quality_bad(paragraph, _assign_speakers(bubbles)):
-            paragraph = _repair_paragraph(host, model, _assign_speakers(bubbles), paragraph)
-            paragraph, used = _finalize_paragraph(paragraph, _assign_speakers(bubbles), payload["allow_quotes"], payload["valid_quotes"])
+        speakers = _assign_speakers(bubbles)
+        paragraph, used = _finalize_paragraph(raw_para, speakers, payload["allow_quotes"], payload["valid_quotes"])
+        if _quality_bad(paragraph, speakers):
+            paragraph = _repair_paragraph(host, model, speakers, paragraph)
+            paragraph, used = _finalize_paragraph(paragraph, speakers, payload["allow_quotes"], payload["valid_quotes"])
 
-        out.append({
+        return {
             **page,
             "model": model,
             "paragraph": paragraph,
@@ -365,8 +408,9 @@ def summarize_text_pages(jsonl_in: str, jsonl_out: str, model: str, host: str):
             "ordered_bubbles_text": bubbles,
             "used_quotes": used,
             "warnings_text": js.get("warnings", []),
-        })
-    write_jsonl(jsonl_out, out)
+        }
+
+    write_jsonl(jsonl_out, _map_llm(_one, pages))
 
 def summarize_vlm_pages(jsonl_in: str, jsonl_out: str, model: str, host: str):
     """VLM paragraph with validation and optional text fallback."""
@@ -377,8 +421,8 @@ def summarize_vlm_pages(jsonl_in: str, jsonl_out: str, model: str, host: str):
 
     panels = _read_jsonl(jsonl_in)
     pages = _group_panels_by_page(panels)
-    out = []
-    for page in pages:
+
+    def _one(page: Dict) -> Dict:
         bubbles = _clean_bubbles_soft(page["bubbles"])
         payload = _paragraph_payload(page, bubbles)
 
@@ -393,16 +437,17 @@ def summarize_vlm_pages(jsonl_in: str, jsonl_out: str, model: str, host: str):
         raw_para = (js_vlm.get("paragraph", js_vlm.get("raw", "")) or "").strip()
         warnings_vlm = _as_list(js_vlm.get("warnings"))
 
-        paragraph, used = _finalize_paragraph(raw_para, _assign_speakers(bubbles), payload["allow_quotes"], payload["valid_quotes"])
-        if _quality_bad(paragraph, _assign_speakers(bubbles)):
+        speakers = _assign_speakers(bubbles)
+        paragraph, used = _finalize_paragraph(raw_para, speakers, payload["allow_quotes"], payload["valid_quotes"])
+        if _quality_bad(paragraph, speakers):
             # Fallback: regenerate with text LLM
             js_text = _safe_json(generate(host=host, model=FALLBACK_TEXT_MODEL, system=PARA_SYSTEM_TEXT,
                                           prompt=PARA_USER_TEXT_TEMPLATE.format(payload=json.dumps(payload, ensure_ascii=False))))
             raw2 = (js_text.get("paragraph", js_text.get("raw", "")) or "").strip()
-            paragraph, used = _finalize_paragraph(raw2, _assign_speakers(bubbles), payload["allow_quotes"], payload["valid_quotes"])
+            paragraph, used = _finalize_paragraph(raw2, speakers, payload["allow_quotes"], payload["valid_quotes"])
             warnings_vlm.append(f"vlm_paragraph_refined_with_text_llm:{FALLBACK_TEXT_MODEL}")
 
-        out.append({
+        return {
             **page,
             "model": model,
             "paragraph": paragraph,
@@ -411,8 +456,9 @@ def summarize_vlm_pages(jsonl_in: str, jsonl_out: str, model: str, host: str):
             "ordered_bubbles_vlm": bubbles,
             "used_quotes_vlm": used,
             "warnings_vlm": warnings_vlm,
-        })
-    write_jsonl(jsonl_out, out)
+        }
+
+    write_jsonl(jsonl_out, _map_llm(_one, pages))
 
 # Aliases kept for CLI flags
 def summarize_text_pages_paragraph(jsonl_in: str, jsonl_out: str, model: str, host: str):
@@ -426,8 +472,8 @@ def summarize_vlm_pages_paragraph(jsonl_in: str, jsonl_out: str, model: str, hos
 def summarize_text_pages_novel(jsonl_in: str, jsonl_out: str, model: str, host: str):
     panels = _read_jsonl(jsonl_in)
     pages = _group_panels_by_page(panels)
-    out = []
-    for page in pages:
+
+    def _one(page: Dict) -> Dict:
         raw = page["bubbles"]
         bubbles = _clean_bubbles(raw)
         dialogue_lines = _assign_speakers(bubbles)
@@ -439,20 +485,21 @@ def summarize_text_pages_novel(jsonl_in: str, jsonl_out: str, model: str, host:
             cleaned_dialogue = _assign_speakers(cleaned_dialogue)
         paragraph = (js.get("scene_paragraph", js.get("raw", "")) or "").strip()
         paragraph = _sanitize_paragraph_block(paragraph)
-        out.append({
+        return {
             **page,
             "novel_model": model,
             "cleaned_dialogue": cleaned_dialogue,
             "scene_paragraph": paragraph,
             "warnings": js.get("warnings", []),
-        })
-    write_jsonl(jsonl_out, out)
+        }
+
+    write_jsonl(jsonl_out, _map_llm(_one, pages))
 
 def summarize_vlm_pages_novel(jsonl_in: str, jsonl_out: str, model: str, host: str):
     panels = _read_jsonl(jsonl_in)
     pages = _group_panels_by_page(panels)
-    out = []
-    for page in pages:
+
+    def _one(page: Dict) -> Dict:
         raw = page["bubbles"]
         bubbles = _clean_bubbles(raw)
         dialogue_lines = _assign_speakers(bubbles)
@@ -464,11 +511,12 @@ def summarize_vlm_pages_novel(jsonl_in: str, jsonl_out: str, model: str, host: s
             cleaned_dialogue = _assign_speakers(cleaned_dialogue)
         paragraph = (js.get("scene_paragraph", js.get("raw", "")) or "").strip()
         paragraph = _sanitize_paragraph_block(paragraph)
-        out.append({
+        return {
             **page,
             "novel_model": model,
             "cleaned_dialogue": cleaned_dialogue,
             "scene_paragraph": paragraph,
             "warnings": js.get("warnings", []),
-        })
-    write_jsonl(jsonl_out, out)
+        }
+
+    write_jsonl(jsonl_out, _map_llm(_one, pages))
@@ -1,14 +1,75 @@
 # src/llm/utils.py
-import json
+from typing import Tuple
+
+from src.export.jsonl_writer import loads_line
+
+# ---------- text stats for the bubble cleaners ----------
+# ASCII input is counted with bytes.translate(None, delete), a C loop per class
+# with no per-call array overhead; other text falls back to the str methods.
+_SOFT_PUNCT = frozenset(".,?!'\"-…:;()[]")
+_LETTER_BYTES = frozenset(range(ord("A"), ord("Z") + 1)) | frozenset(range(ord("a"), ord("z") + 1))
+_DIGIT_BYTES = frozenset(range(ord("0"), ord("9") + 1))
+_QUIET_BYTES = frozenset(ord(c) for c in " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f" + "".join(_SOFT_PUNCT) if ord(c) < 128)
+# deletion tables: what survives translate(None, table) is the class being counted
+# (letters, digits, and everything outside letters/digits/quiet chars respectively)
+_DROP_LETTERS = bytes(i for i in range(256) if i not in _LETTER_BYTES)
+_DROP_DIGITS = bytes(i for i in range(256) if i not in _DIGIT_BYTES)
+_DROP_ALLOWED = bytes(sorted(_LETTER_BYTES | _DIGIT_BYTES | _QUIET_BYTES))
+
+
+def char_class_counts(s: str) -> Tuple[int, int, int]:
+    """
+    (letters, digits, non_alnum) for a cleaned bubble line, where non_alnum
+    counts chars that are not alnum, whitespace, or soft punctuation. ASCII
+    strings (the normal case after sanitizing) are counted at C speed; anything
+    else falls back to one loop over the str methods so results are identical.
+    """
+    if s.isascii():
+        b = s.encode("ascii")
+        return (len(b.translate(None, _DROP_LETTERS)), len(b.translate(None, _DROP_DIGITS)),
+                len(b.translate(None, _DROP_ALLOWED)))
+    letters = digits = non_alnum = 0
+    for ch in s:
+        if ch.isalpha():
+            letters += 1
+        if ch.isdigit():
+            digits += 1
+        if not (ch.isalnum() or ch.isspace() or ch in _SOFT_PUNCT):
+            non_alnum += 1
+    return letters, digits, non_alnum
+
+
+def char_counts(s: str) -> Tuple[int, int]:
+    """(letters, non_alnum); see char_class_counts."""
+    letters, _, non_alnum = char_class_counts(s)
+    return letters, non_alnum
+
+
+def ascii_ratio(s: str) -> float:
+    """Share of ASCII chars; 1.0 for empty text."""
+    if not s:
+        return 1.0
+    # encode() drops every non-ASCII char in C
+    return len(s.encode("ascii", "ignore")) / len(s)
+
+
+def alpha_ratio(s: str) -> float:
+    """Share of alphabetic chars (str.isalpha); 0.0 for empty text."""
+    if not s:
+        return 0.0
+    if s.isascii():
+        return len(s.encode("ascii").translate(None, _DROP_LETTERS)) / len(s)
+    return sum(ch.isalpha() for ch in s) / len(s)
+
 
 def needs_vlm(text_paragraph_jsonl_path: str) -> bool:
     """
     Heuristic: trigger VLM only if any page paragraph is very short/empty.
     """
     try:
-        with open(text_paragraph_jsonl_path, "r", encoding="utf-8") as f:
+        with open(text_paragraph_jsonl_path, "rb") as f:
             for line in f:
-                obj = json.loads(line)
+                obj = loads_line(line)
                 p = (obj.get("paragraph") or "").strip()
                 if len(p) < 120:
                     return True
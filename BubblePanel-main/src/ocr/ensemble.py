@@ -5,16 +5,15 @@ import numpy as np
 
 Word = Dict[str, object]  # {"box":[x,y,w,h], "text":str, "conf":float, "source":str}
 
-def _iou(a, b) -> float:
-    ax,ay,aw,ah = a; bx,by,bw,bh = b
-    ax2, ay2 = ax+aw, ay+ah
-    bx2, by2 = bx+bw, by+bh
-    inter_w = max(0, min(ax2, bx2) - max(ax, bx))
-    inter_h = max(0, min(ay2, by2) - max(ay, by))
-    inter = inter_w * inter_h
-    if inter == 0: return 0.0
-    union = aw*ah + bw*bh - inter + 1e-6
-    return inter / union
+def _iou_matrix(boxes: np.ndarray) -> np.ndarray:
+    """(N,N) IoU for xywh boxes, same convention as the old pairwise helper."""
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    iw = np.maximum(0.0, np.minimum(x2[:, None], x2[None, :]) - np.maximum(x1[:, None], x1[None, :]))
+    ih = np.maximum(0.0, np.minimum(y2[:, None], y2[None, :]) - np.maximum(y1[:, None], y1[None, :]))
+    inter = iw * ih
+    areas = boxes[:, 2] * boxes[:, 3]
+    return inter / (areas[:, None] + areas[None, :] - inter + 1e-6)
 
 def merge_words(all_words: List[Word], iou_thr: float=0.5,
                 prefer_longer_text: bool=True, conf_weighted_avg: bool=True) -> List[Word]:
@@ -23,31 +22,32 @@ def merge_words(all_words: List[Word], iou_thr: float=0.5,
     # sort by confidence desc
     words = sorted(all_words, key=lambda w: float(w.get("conf", 0.0)), reverse=True)
     merged: List[Word] = []
-    used = [False]*len(words)
+    n = len(words)
+    used = np.zeros(n, dtype=bool)
+    boxes = np.array([w["box"] for w in words], dtype=np.float64).reshape(-1, 4)
+    confs_all = np.clip(np.array([float(w.get("conf", 0.0)) for w in words], dtype=float), 1e-6, None)
+    # all pairwise IoUs in one shot; the greedy walk only reads rows of it
+    hits = _iou_matrix(boxes) >= iou_thr
 
-    for i, wi in enumerate(words):
+    for i in range(n):
         if used[i]: continue
-        group = [wi]
+        js = np.flatnonzero(hits[i, i+1:] & ~used[i+1:]) + (i + 1)
         used[i] = True
-        for j in range(i+1, len(words)):
-            if used[j]: continue
-            wj = words[j]
-            if _iou(wi["box"], wj["box"]) >= iou_thr:
-                used[j] = True
-                group.append(wj)
+        used[js] = True
+        group = [words[i]] + [words[j] for j in js]
 
         # merge group
         if conf_weighted_avg:
-            confs = np.array([float(w.get("conf",0.0)) for w in group], dtype=float)
-            confs = np.clip(confs, 1e-6, None)
-            xs = np.array([w["box"][0] for w in group], dtype=float)
-            ys = np.array([w["box"][1] for w in group], dtype=float)
-            ws = np.array([w["box"][2] for w in group], dtype=float)
-            hs = np.array([w["box"][3] for w in group], dtype=float)
-            wavg = lambda arr: float(np.sum(arr*confs)/np.sum(confs))
-            box = [int(round(wavg(xs))), int(round(wavg(ys))),
-                   int(round(wavg(ws))), int(round(wavg(hs)))]
-            conf = float(np.max(confs))
+            if js.size == 0:
+                # singleton: the weighted average is the box itself
+                box = [int(round(float(v))) for v in boxes[i]]
+                conf = float(confs_all[i])
+            else:
+                g = np.concatenate(([i], js))
+                confs = confs_all[g]
+                avg = np.sum(boxes[g] * confs[:, None], axis=0) / np.sum(confs)
+                box = [int(round(float(v))) for v in avg]
+                conf = float(np.max(confs))
         else:
             box = group[0]["box"]; conf = float(group[0].get("conf",0.0))
 
@@ -4,6 +4,8 @@ ROI-level OCR utilities used by the manga pipeline.
 
 - Tries multiple backends on each bubble ROI (order is configurable).
 - Returns the FIRST non-empty text found together with the backend name.
+- ROIs are OCR'd in batches (BubbleBatcher), optionally across pages.
+- Engines are built once per process (see the get_* singletons).
 - Defensive against backends returning None / odd shapes.
 
 Backends supported (install as you like):
@@ -13,6 +15,10 @@ Backends supported (install as you like):
   - easyocr      (requires torch/torchvision)
 """
 
+import functools
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 import cv2
 import numpy as np
@@ -30,129 +36,327 @@ def _clean_text(s: str) -> str:
     return " ".join(s.split())
 
 
-# ----------------------- individual backends (ROI) -----------------------
+# ----------------------- engine singletons -----------------------
+# Engines load model weights on construction, so each is built at most once per
+# process and config. A failed import/construction is cached as None too, so a
+# missing backend is probed once rather than per batch. The engines are not
+# guaranteed thread-safe and are shared by bubble OCR and full-page OCR (which
+# can run on different threads), so every call holds that engine's lock.
 
-def _ocr_tesseract(roi_bgr: np.ndarray, cfg: dict) -> Tuple[str, str]:
-    try:
-        import pytesseract
-    except Exception:
-        return "", "tesseract(unavailable)"
+ENGINE_LOCKS = {name: threading.Lock() for name in ("easyocr", "rapidocr", "paddleocr")}
 
-    tcmd = cfg.get("ocr", {}).get("tesseract_cmd") or cfg.get("tesseract_cmd")
-    if tcmd:
-        pytesseract.pytesseract.tesseract_cmd = tcmd
+def _build_once(fn):
+    """lru_cache whose first callers don't race: full-page OCR backends and the
+    bubble batcher may ask for the same engine concurrently on a cold process,
+    and a bare lru_cache would load the model weights once per caller."""
+    cached = functools.lru_cache(maxsize=4)(fn)
+    lock = threading.Lock()
 
-    langs = cfg.get("ocr", {}).get("tesseract_langs", ["eng"])
-    lang_str = "+".join(langs) if langs else "eng"
+    @functools.wraps(fn)
+    def get(*args):
+        with lock:
+            return cached(*args)
+    get.cache_clear = cached.cache_clear
+    return get
 
-    gray = _to_gray(roi_bgr)
-    thr = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+# ----------------------- device selection -----------------------
+# ocr.gpu: "auto" (default) uses CUDA when the backend's runtime sees a device,
+# true/false force it. Engines that fail to build on the GPU fall back to CPU.
+
+@functools.lru_cache(maxsize=None)
+def _cuda_available(backend: str) -> bool:
     try:
-        txt = pytesseract.image_to_string(thr, lang=lang_str, config="--psm 6")
+        if backend == "easyocr":
+            import torch
+            return bool(torch.cuda.is_available())
+        if backend == "rapidocr":
+            import onnxruntime
+            return "CUDAExecutionProvider" in onnxruntime.get_available_providers()
+        if backend == "paddleocr":
+            import paddle
+            return paddle.device.cuda.device_count() > 0
     except Exception:
-        return "", "tesseract(error)"
-    return _clean_text(txt), "tesseract"
+        pass
+    return False
 
+def use_gpu(cfg: dict, backend: str) -> bool:
+    """Whether `backend` should be built on the GPU under this config."""
+    want = cfg.get("ocr", {}).get("gpu", "auto")
+    if isinstance(want, str) and want.lower() == "auto":
+        return _cuda_available(backend)
+    return bool(want)
 
-def _ocr_easyocr(roi_bgr: np.ndarray, cfg: dict) -> Tuple[str, str]:
-    try:
-        import easyocr
-    except Exception:
-        return "", "easyocr(unavailable)"
 
-    lang = cfg.get("ocr", {}).get("lang", "en")
-    mapped = "en" if lang in ("en", "eng") else lang
+@_build_once
+def get_easyocr(lang: str, gpu: bool = False):
     try:
-        reader = easyocr.Reader([mapped], gpu=False, verbose=False)
-        out = reader.readtext(_to_gray(roi_bgr)) or []   # guard
+        import easyocr
     except Exception:
-        return "", "easyocr(error)"
-
-    parts: List[str] = []
-    for item in out:
-        if not isinstance(item, (list, tuple)) or len(item) < 2:
+        return None, "unavailable"
+    for dev in ((True, False) if gpu else (False,)):
+        try:
+            return easyocr.Reader([lang], gpu=dev, verbose=False), ""
+        except Exception:
             continue
-        _, text, _ = item
-        if (text or "").strip():
-            parts.append(str(text))
-    return _clean_text(" ".join(parts)), "easyocr"
+    return None, "error"
 
 
-def _ocr_rapidocr(roi_bgr: np.ndarray, cfg: dict) -> Tuple[str, str]:
+@_build_once
+def get_rapidocr(gpu: bool = False):
     try:
         from rapidocr_onnxruntime import RapidOCR
     except Exception:
-        return "", "rapidocr(unavailable)"
-    try:
-        rocr = RapidOCR()
-        results, _ = rocr(_to_gray(roi_bgr))
-        results = results or []   # guard
-    except Exception:
-        return "", "rapidocr(error)"
-
-    parts: List[str] = []
-    for item in results:
-        if not item or len(item) < 3:
+        return None, "unavailable"
+    for dev in ((True, False) if gpu else (False,)):
+        try:
+            if dev:
+                return RapidOCR(det_use_cuda=True, cls_use_cuda=True, rec_use_cuda=True), ""
+            return RapidOCR(), ""
+        except Exception:
             continue
-        _, text, _ = item
-        if (text or "").strip():
-            parts.append(str(text))
-    return _clean_text(" ".join(parts)), "rapidocr"
+    return None, "error"
 
 
-def _ocr_paddleocr(roi_bgr: np.ndarray, cfg: dict) -> Tuple[str, str]:
+@_build_once
+def get_paddleocr(lang: str, gpu: bool = False):
     try:
         from paddleocr import PaddleOCR
     except Exception:
-        return "", "paddleocr(unavailable)"
+        return None, "unavailable"
+    for dev in ((True, False) if gpu else (False,)):
+        try:
+            return PaddleOCR(use_angle_cls=True, lang=lang, show_log=False, use_gpu=dev), ""
+        except Exception:
+            continue
+    return None, "error"
 
-    lang = cfg.get("ocr", {}).get("lang", "en")
+
+def _map_rois(fn, rois: List[np.ndarray], workers: int | None = None) -> List:
+    """fn over rois in order; threaded when more than one worker is allowed.
+    Defaults to cv2.getNumThreads(), so process-pool workers pinned to one
+    OpenCV thread stay sequential."""
+    n = min(len(rois), max(1, int(workers or cv2.getNumThreads())))
+    if n <= 1:
+        return [fn(r) for r in rois]
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        return list(ex.map(fn, rois))
+
+
+# ----------------------- individual backends (ROI batch) -----------------------
+# Each backend takes a list of ROIs and returns one (text, tag) per ROI, using
+# the process-wide engine from the getters above.
+
+def _ocr_tesseract(rois: List[np.ndarray], cfg: dict) -> List[Tuple[str, str]]:
     try:
-        ocr = PaddleOCR(use_angle_cls=True, lang=lang, show_log=False)
-        res = ocr.ocr(_to_gray(roi_bgr), cls=True) or []   # guard
+        import pytesseract
     except Exception:
-        return "", "paddleocr(error)"
+        return [("", "tesseract(unavailable)")] * len(rois)
+
+    tcmd = cfg.get("ocr", {}).get("tesseract_cmd") or cfg.get("tesseract_cmd")
+    if tcmd:
+        pytesseract.pytesseract.tesseract_cmd = tcmd
 
-    parts: List[str] = []
-    for line in res:
-        if not line:
+    langs = cfg.get("ocr", {}).get("tesseract_langs", ["eng"])
+    lang_str = "+".join(langs) if langs else "eng"
+
+    def one(roi: np.ndarray) -> Tuple[str, str]:
+        gray = _to_gray(roi)
+        thr = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        try:
+            txt = pytesseract.image_to_string(thr, lang=lang_str, config="--psm 6")
+        except Exception:
+            return "", "tesseract(error)"
+        return _clean_text(txt), "tesseract"
+
+    # Tesseract has no batch API and runs one subprocess per call, so fan the
+    # ROIs out over threads (they only wait on the child process).
+    return _map_rois(one, rois, cfg.get("ocr", {}).get("tesseract_workers"))
+
+
+def _ocr_easyocr(rois: List[np.ndarray], cfg: dict) -> List[Tuple[str, str]]:
+    lang = cfg.get("ocr", {}).get("lang", "en")
+    mapped = "en" if lang in ("en", "eng") else lang
+    reader, why = get_easyocr(mapped, use_gpu(cfg, "easyocr"))
+    if reader is None:
+        return [("", f"easyocr({why})")] * len(rois)
+
+    res: List[Tuple[str, str]] = []
+    for roi in rois:
+        try:
+            with ENGINE_LOCKS["easyocr"]:
+                out = reader.readtext(_to_gray(roi)) or []   # guard
+        except Exception:
+            res.append(("", "easyocr(error)"))
+            continue
+        parts: List[str] = []
+        for item in out:
+            if not isinstance(item, (list, tuple)) or len(item) < 2:
+                continue
+            _, text, _ = item
+            if (text or "").strip():
+                parts.append(str(text))
+        res.append((_clean_text(" ".join(parts)), "easyocr"))
+    return res
+
+
+def _ocr_rapidocr(rois: List[np.ndarray], cfg: dict) -> List[Tuple[str, str]]:
+    rocr, why = get_rapidocr(use_gpu(cfg, "rapidocr"))
+    if rocr is None:
+        return [("", f"rapidocr({why})")] * len(rois)
+
+    out: List[Tuple[str, str]] = []
+    for roi in rois:
+        try:
+            with ENGINE_LOCKS["rapidocr"]:
+                results, _ = rocr(_to_gray(roi))
+            results = results or []   # guard
+        except Exception:
+            out.append(("", "rapidocr(error)"))
             continue
-        for tup in (line or []):
-            if not tup or len(tup) < 2:
+        parts: List[str] = []
+        for item in results:
+            if not item or len(item) < 3:
                 continue
-            _, (text, _conf) = tup
+            _, text, _ = item
             if (text or "").strip():
                 parts.append(str(text))
-    return _clean_text(" ".join(parts)), "paddleocr"
+        out.append((_clean_text(" ".join(parts)), "rapidocr"))
+    return out
+
+
+def _ocr_paddleocr(rois: List[np.ndarray], cfg: dict) -> List[Tuple[str, str]]:
+    lang = cfg.get("ocr", {}).get("lang", "en")
+    ocr, why = get_paddleocr(lang, use_gpu(cfg, "paddleocr"))
+    if ocr is None:
+        return [("", f"paddleocr({why})")] * len(rois)
+
+    out: List[Tuple[str, str]] = []
+    for roi in rois:
+        try:
+            with ENGINE_LOCKS["paddleocr"]:
+                res = ocr.ocr(_to_gray(roi), cls=True) or []   # guard
+        except Exception:
+            out.append(("", "paddleocr(error)"))
+            continue
+        parts: List[str] = []
+        for line in res:
+            if not line:
+                continue
+            for tup in (line or []):
+                if not tup or len(tup) < 2:
+                    continue
+                _, (text, _conf) = tup
+                if (text or "").strip():
+                    parts.append(str(text))
+        out.append((_clean_text(" ".join(parts)), "paddleocr"))
+    return out
+
 
+_BACKENDS = {
+    "rapidocr": _ocr_rapidocr,
+    "paddleocr": _ocr_paddleocr,
+    "tesseract": _ocr_tesseract,
+    "easyocr": _ocr_easyocr,
+}
 
-# ----------------------- dispatcher (ROI) -----------------------
 
-def _ocr_roi_multibackend(roi_bgr: np.ndarray, cfg: dict) -> Tuple[str, str]:
+# ----------------------- dispatcher (ROI batch) -----------------------
+
+def _roi_key(roi: np.ndarray) -> Tuple:
+    """Exact content key: shape + BLAKE2b of the pixels."""
+    roi = np.ascontiguousarray(roi)
+    return roi.shape, hashlib.blake2b(roi, digest_size=16).digest()
+
+
+def _ocr_rois_multibackend(rois: List[np.ndarray], cfg: dict) -> List[Tuple[str, str]]:
+    """
+    First non-empty text per ROI; each backend only sees the ROIs still unread.
+    Pixel-identical ROIs (e.g. duplicate bubble boxes) are OCR'd once.
+    """
+    uniq: Dict[Tuple, int] = {}
+    slot = [uniq.setdefault(_roi_key(r), i) for i, r in enumerate(rois)]
+    if len(uniq) < len(rois):
+        firsts = sorted(uniq.values())
+        outs = _ocr_rois_multibackend([rois[i] for i in firsts], cfg)
+        by_first = dict(zip(firsts, outs))
+        return [by_first[j] for j in slot]
+
     order = cfg.get("ocr", {}).get(
         "backends", ["rapidocr", "paddleocr", "tesseract", "easyocr"]
     )
+    results: List[Tuple[str, str]] = [("", "none")] * len(rois)
+    pending = list(range(len(rois)))
     for be in order:
-        if be == "rapidocr":
-            txt, tag = _ocr_rapidocr(roi_bgr, cfg)
-        elif be == "paddleocr":
-            txt, tag = _ocr_paddleocr(roi_bgr, cfg)
-        elif be == "tesseract":
-            txt, tag = _ocr_tesseract(roi_bgr, cfg)
-        elif be == "easyocr":
-            txt, tag = _ocr_easyocr(roi_bgr, cfg)
-        else:
+        fn = _BACKENDS.get(be)
+        if fn is None or not pending:
             continue
-        if txt:
-            return txt, tag
-    return "", "none"
+        outs = fn([rois[i] for i in pending], cfg)
+        still = []
+        for i, (txt, tag) in zip(pending, outs):
+            if txt:
+                results[i] = (txt, tag)
+            else:
+                still.append(i)
+        pending = still
+    return results
+
+
+class BubbleBatcher:
+    """
+    Collects bubble ROIs from one or more pages and OCRs them in a single
+    multi-backend pass, so engines are built once per batch rather than per
+    bubble. flush() scatters results back per page key in bubble order.
+    """
+
+    def __init__(self, cfg: dict, batch_size: int | None = None):
+        self.cfg = cfg
+        self.batch_size = int(batch_size or cfg.get("ocr", {}).get("batch_size", 32))
+        self._pages: Dict[object, List[Dict]] = {}
+        self._rois: List[np.ndarray] = []
+        self._slots: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self._rois)
+
+    def full(self) -> bool:
+        return len(self._rois) >= self.batch_size
+
+    def add_page(self, key, bgr: np.ndarray, bubble_boxes: List[Box],
+                 gray: np.ndarray | None = None) -> None:
+        """Queue a page's bubbles. Pass the page's gray image to crop from it
+        directly (backends only read gray), skipping a per-crop conversion.
+        Gray crops are views (backends never write to them); BGR crops are
+        converted to gray once here rather than in every backend tried."""
+        recs: List[Dict] = []
+        for box in (bubble_boxes or []):
+            x, y, w, h = map(int, box)
+            rec = {"box": [x, y, w, h], "text": "", "backend": "none"}
+            recs.append(rec)
+            if w <= 1 or h <= 1:
+                continue
+            if gray is not None:
+                roi = gray[y:y+h, x:x+w]
+            else:
+                roi = _to_gray(bgr[y:y+h, x:x+w])
+            self._rois.append(roi)
+            self._slots.append(rec)
+        self._pages[key] = recs
+
+    def flush(self) -> Dict[object, List[Dict]]:
+        pages, rois, slots = self._pages, self._rois, self._slots
+        self._pages, self._rois, self._slots = {}, [], []
+        for rec, (text, backend) in zip(slots, _ocr_rois_multibackend(rois, self.cfg)):
+            rec["text"], rec["backend"] = text, backend
+        return pages
 
 
 # ----------------------- public API -----------------------
 
-def ocr_bubbles(bgr: np.ndarray, bubble_boxes: List[Box], cfg: dict) -> List[Dict]:
+def ocr_bubbles(bgr: np.ndarray, bubble_boxes: List[Box], cfg: dict,
+                gray: np.ndarray | None = None) -> List[Dict]:
     """
     OCR each bubble ROI using multiple backends in order (first non-empty wins).
+    `gray` (optional) is the page already converted to grayscale.
 
     Returns:
       [
@@ -160,13 +364,6 @@ def ocr_bubbles(bgr: np.ndarray, bubble_boxes: List[Box], cfg: dict) -> List[Dic
         ...
       ]
     """
-    results: List[Dict] = []
-    for box in (bubble_boxes or []):
-        x, y, w, h = map(int, box)
-        if w <= 1 or h <= 1:
-            results.append({"box":[x,y,w,h], "text":"", "backend":"none"})
-            continue
-        roi = bgr[y:y+h, x:x+w].copy()
-        text, backend = _ocr_roi_multibackend(roi, cfg)
-        results.append({"box":[x,y,w,h], "text": text, "backend": backend})
-    return results
+    batcher = BubbleBatcher(cfg)
+    batcher.add_page(0, bgr, bubble_boxes, gray=gray)
+    return batcher.flush()[0]
@@ -16,58 +16,75 @@ Enable verbose logs from the caller:
 """
 
 from __future__ import annotations
-from typing import List, Tuple, Dict
-import copy
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Tuple, Dict, Optional
+import hashlib
+import os
 
 import cv2
 import numpy as np
 
-from src.detectors.bubbles import detect_bubbles_in_panel, nms_boxes
+from src.common.utils import ensure_dir, save_json
+from src.detectors import morph
+from src.detectors.bubbles import PagePriors, detect_bubbles_in_panel, nms_add, nms_boxes, nms_indices
+from src.export.jsonl_writer import loads_line
+from src.ocr.ocr import ENGINE_LOCKS, get_easyocr, get_paddleocr, get_rapidocr, use_gpu
 
 Box  = Tuple[int, int, int, int]     # (x, y, w, h)
 Word = Dict[str, object]             # {"box":[x,y,w,h], "text":str, "conf":float, "source":str}
 
+# Full-page OCR backends allowed to run at once
+OCR_CONCURRENCY = max(1, int(os.getenv("BUBBLEPANEL_OCR_CONCURRENCY", "4")))
+
+# Full-page OCR results are memoized on disk by page content (reconcile.ocr_cache);
+# bump the version when backend output handling changes.
+_OCR_CACHE_VERSION = 4
+_OCR_CACHE_DIR = os.path.join(
+    os.path.expanduser(os.getenv("BUBBLEPANEL_CACHE_DIR", "~/.cache/bubblepanel")), "ocr")
+
 # ----------------------------- small helpers ----------------------------- #
 
 def _dbg(verbose: bool, msg: str) -> None:
     if verbose:
         print(msg, flush=True)
 
-def _center(b: Box) -> Tuple[float, float]:
-    x, y, w, h = b
-    return x + w / 2.0, y + h / 2.0
+def _box_centers(boxes) -> Tuple[np.ndarray, np.ndarray]:
+    """Center x/y arrays for a list of (x, y, w, h) boxes."""
+    a = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return a[:, 0] + a[:, 2] / 2.0, a[:, 1] + a[:, 3] / 2.0
 
-def _point_in_box(px: float, py: float, b: Box) -> bool:
+def _in_box(cx: np.ndarray, cy: np.ndarray, b: Box) -> np.ndarray:
+    """Mask of points inside box `b` (edges inclusive)."""
     x, y, w, h = b
-    return (x <= px <= x + w) and (y <= py <= y + h)
+    return (cx >= x) & (cx <= x + w) & (cy >= y) & (cy <= y + h)
 
-def _words_in_box(words: List[Word], scope: Box) -> List[Word]:
-    sx, sy, sw, sh = scope
-    out = []
-    for w in words:
-        x, y, ww, hh = w["box"]
-        cx, cy = x + ww / 2.0, y + hh / 2.0
-        if sx <= cx <= sx + sw and sy <= cy <= sy + sh:
-            out.append(w)
-    return out
+def _boxes_in(boxes: List[Box], scope: Box) -> List[Box]:
+    """Boxes whose center lies inside `scope`."""
+    if not boxes:
+        return []
+    return [boxes[i] for i in np.flatnonzero(_in_box(*_box_centers(boxes), scope))]
 
-def _coverage(words_in_panel: List[Word], bubbles: List[Box]) -> float:
-    """Fraction of word centers that land inside at least one bubble."""
-    if not words_in_panel:
+def _coverage(cx: np.ndarray, cy: np.ndarray, bubbles: List[Box]) -> float:
+    """Fraction of word centers (cx, cy) that land inside at least one bubble."""
+    if cx.size == 0:
         return 1.0
-    covered = 0
-    for w in words_in_panel:
-        x, y, ww, hh = w["box"]
-        cx, cy = x + ww / 2.0, y + hh / 2.0
-        if any(_point_in_box(cx, cy, b) for b in bubbles):
-            covered += 1
-    return covered / float(len(words_in_panel))
+    if not bubbles:
+        return 0.0
+    b = np.asarray(bubbles, dtype=np.float64).reshape(-1, 4)
+    x0, y0 = b[:, 0], b[:, 1]
+    x1, y1 = x0 + b[:, 2], y0 + b[:, 3]
+    # (words × bubbles) point-in-rect in one broadcast
+    inside = ((cx[:, None] >= x0) & (cx[:, None] <= x1) &
+              (cy[:, None] >= y0) & (cy[:, None] <= y1))
+    return float(np.count_nonzero(inside.any(axis=1))) / float(cx.size)
 
 def _relax_cfg(cfg: dict, verbose: bool=False) -> dict:
     """
     Make a slightly more permissive copy of the config for a re-try on a weak panel.
+    Only top-level scalars change, so a shallow copy suffices (nested sections
+    are shared read-only with the caller's cfg).
     """
-    c = copy.deepcopy(cfg)
+    c = dict(cfg)
     recon = cfg.get("reconcile", {})
     c["text_group_merge_px"] = int(cfg.get("text_group_merge_px", 58)
                                    + recon.get("rerun_merge_px_add", 20))
@@ -85,12 +102,112 @@ def _relax_cfg(cfg: dict, verbose: bool=False) -> dict:
 
 # ----------------------------- OCR over full page ----------------------------- #
 
-def _rect_from_quad(quad) -> Tuple[int, int, int, int]:
+def _rect_from_quad(quad, inv_scale: float = 1.0) -> Tuple[int, int, int, int]:
+    """Bounding rect of a detector quad, mapped back to native page coordinates."""
+    if inv_scale != 1.0:
+        quad = [(p[0] * inv_scale, p[1] * inv_scale) for p in quad]
     xs = [int(p[0]) for p in quad]; ys = [int(p[1]) for p in quad]
     x, y = min(xs), min(ys)
     w, h = max(xs) - x, max(ys) - y
     return int(x), int(y), max(1, int(w)), max(1, int(h))
 
+def _run_rapid(bgr, cfg: dict, inv_scale: float = 1.0) -> List[Word]:
+    rocr, why = get_rapidocr(use_gpu(cfg, "rapidocr"))
+    if rocr is None:
+        raise RuntimeError(why)
+    with ENGINE_LOCKS["rapidocr"]:
+        results, _ = rocr(bgr)
+    words = []
+    for quad, text, score in (results or []):
+        x, y, w, h = _rect_from_quad(quad, inv_scale)
+        words.append({"box":[x,y,w,h], "text": text or "", "conf": float(score or 0.0), "source": "rapidocr"})
+    return words
+
+def _run_paddle(bgr, cfg: dict, inv_scale: float = 1.0) -> List[Word]:
+    po, why = get_paddleocr(cfg.get("ocr", {}).get("lang", "en"), use_gpu(cfg, "paddleocr"))
+    if po is None:
+        raise RuntimeError(why)
+    with ENGINE_LOCKS["paddleocr"]:
+        res = po.ocr(bgr, cls=True)
+    words = []
+    for line in (res or []):
+        for det, (text, conf) in line:
+            x, y, w, h = _rect_from_quad(det, inv_scale)
+            words.append({"box":[x,y,w,h], "text": text or "", "conf": float(conf or 0.0), "source":"paddleocr"})
+    return words
+
+def _run_easy(bgr, cfg: dict, inv_scale: float = 1.0) -> List[Word]:
+    lang = cfg.get("ocr", {}).get("lang", "en")
+    reader, why = get_easyocr("en" if lang in ("en", "eng") else lang, use_gpu(cfg, "easyocr"))
+    if reader is None:
+        raise RuntimeError(why)
+    words = []
+    with ENGINE_LOCKS["easyocr"]:
+        out = reader.readtext(bgr)
+    for item in out:
+        if not isinstance(item, (list, tuple)) or len(item) < 2:
+            continue
+        quad, text, conf = item
+        x, y, w, h = _rect_from_quad(quad, inv_scale)
+        words.append({"box":[x,y,w,h], "text": text or "", "conf": float(conf or 0.0), "source":"easyocr"})
+    return words
+
+def _run_tess(bgr, cfg: dict, inv_scale: float = 1.0) -> List[Word]:
+    import pytesseract
+    # the only backend that wants gray; the others expand it back to 3 channels
+    gray = bgr if bgr.ndim == 2 else cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    tcmd = cfg.get("ocr", {}).get("tesseract_cmd") or cfg.get("tesseract_cmd")
+    if tcmd:
+        pytesseract.pytesseract.tesseract_cmd = tcmd
+    langs = cfg.get("ocr", {}).get("tesseract_langs", ["eng"])
+    lang_str = "+".join(langs) if langs else "eng"
+    # sparse text (speech is scattered over the page, not one block), LSTM engine only
+    tconf = cfg.get("ocr", {}).get("tesseract_page_config", "--oem 1 --psm 11")
+    data = pytesseract.image_to_data(gray, lang=lang_str, config=tconf,
+                                     output_type=pytesseract.Output.DICT)
+    N = len(data.get("text", []))
+    levels = data.get("level") or [5] * N
+    words = []
+    for i in range(N):
+        txt = (data["text"][i] or "").strip()
+        # word rows only: page/block/para/line rows carry no text, just big boxes
+        if int(levels[i]) != 5 or not txt:
+            continue
+        try:
+            conf = float(data["conf"][i]) / 100.0
+        except Exception:
+            conf = 0.0
+        x, y = int(data["left"][i]), int(data["top"][i])
+        w, h = int(data["width"][i]), int(data["height"][i])
+        if w*h <= 0: continue
+        if inv_scale != 1.0:
+            x, y, w, h = _rect_from_quad(((x, y), (x + w, y + h)), inv_scale)
+        words.append({"box":[x,y,w,h], "text": txt, "conf": conf, "source":"tesseract"})
+    return words
+
+# (log name, short name, runner) in union order
+_FULLPAGE_BACKENDS = (
+    ("RapidOCR",  "rapidocr",  _run_rapid),
+    ("PaddleOCR", "paddleocr", _run_paddle),
+    ("EasyOCR",   "easyocr",   _run_easy),
+    ("Tesseract", "tesseract", _run_tess),
+)
+
+def _ocr_cache_path(bgr, cfg: dict) -> Optional[str]:
+    """Cache file for this page + OCR settings, or None when caching is off."""
+    recon = cfg.get("reconcile", {})
+    if not recon.get("ocr_cache", True):
+        return None
+    ocr = cfg.get("ocr", {})
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((_OCR_CACHE_VERSION, bgr.shape, ocr.get("lang", "en"),
+                   ocr.get("tesseract_langs", ["eng"]), ocr.get("tesseract_page_config", "--oem 1 --psm 11"),
+                   bool(cfg.get("use_easyocr", False)),
+                   int(ocr.get("max_side", 1600)), bool(ocr.get("tess_full_res", True)),
+                   float(recon.get("word_nms_iou", 0.5)))).encode())
+    h.update(np.ascontiguousarray(bgr))  # exact pixels, not a thumbnail: no near-duplicate collisions
+    return os.path.join(os.path.expanduser(recon.get("ocr_cache_dir") or _OCR_CACHE_DIR), h.hexdigest() + ".json")
+
 def ocr_fullpage_words(bgr, cfg: dict, verbose: bool=False) -> List[Word]:
     """
     Returns a list of words across the FULL page in a common format:
@@ -101,114 +218,112 @@ def ocr_fullpage_words(bgr, cfg: dict, verbose: bool=False) -> List[Word]:
       - PaddleOCR               — strong detector
       - EasyOCR                 — optional (if cfg['use_easyocr'])
       - Tesseract               — classic fallback
-    """
-    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-    words: List[Word] = []
 
-    # RapidOCR
-    try:
-        from rapidocr_onnxruntime import RapidOCR
-        rocr = RapidOCR()
-        results, _ = rocr(gray)
-        rapid = []
-        for quad, text, score in (results or []):
-            x, y, w, h = _rect_from_quad(quad)
-            rapid.append({"box":[x,y,w,h], "text": text or "", "conf": float(score or 0.0), "source": "rapidocr"})
-        words.extend(rapid)
-        _dbg(verbose, f"[RECON] OCR backend: rapidocr   words={len(rapid)}")
-    except Exception as e:
-        _dbg(verbose, f"[RECON] RapidOCR unavailable ({e})")
-
-    # PaddleOCR
-    try:
-        from paddleocr import PaddleOCR
-        lang = cfg.get("ocr", {}).get("lang", "en")
-        po = PaddleOCR(use_angle_cls=True, lang=lang, show_log=False)
-        res = po.ocr(gray, cls=True)
-        padd = []
-        for line in (res or []):
-            for det, (text, conf) in line:
-                x, y, w, h = _rect_from_quad(det)
-                padd.append({"box":[x,y,w,h], "text": text or "", "conf": float(conf or 0.0), "source":"paddleocr"})
-        words.extend(padd)
-        _dbg(verbose, f"[RECON] OCR backend: paddleocr  words={len(padd)}")
-    except Exception as e:
-        _dbg(verbose, f"[RECON] PaddleOCR unavailable ({e})")
-
-    # EasyOCR (optional)
-    if cfg.get("use_easyocr", False):
+    The backends block in native code, so they run concurrently (up to
+    BUBBLEPANEL_OCR_CONCURRENCY at once); words are still collected in the
+    order above; overlapping detections (IoU > reconcile.word_nms_iou) are
+    reduced to the most confident one. Results are cached on disk by page
+    pixels (see _ocr_cache_path).
+
+    Detector cost scales with pixel count, so pages whose long edge exceeds
+    ocr.max_side are downscaled once (INTER_AREA) for the backends and the
+    boxes scaled back; Tesseract keeps native resolution if ocr.tess_full_res.
+    """
+    cache_path = _ocr_cache_path(bgr, cfg)
+    if cache_path and os.path.isfile(cache_path):
         try:
-            import easyocr
-            lang = cfg.get("ocr", {}).get("lang", "en")
-            mapped = "en" if lang in ("en", "eng") else lang
-            reader = easyocr.Reader([mapped], gpu=False, verbose=False)
-            out = reader.readtext(gray)
-            ewords = []
-            for item in out:
-                if not isinstance(item, (list, tuple)) or len(item) < 2:
-                    continue
-                quad, text, conf = item
-                x, y, w, h = _rect_from_quad(quad)
-                ewords.append({"box":[x,y,w,h], "text": text or "", "conf": float(conf or 0.0), "source":"easyocr"})
-            words.extend(ewords)
-            _dbg(verbose, f"[RECON] OCR backend: easyocr    words={len(ewords)}")
+            with open(cache_path, "rb") as f:
+                words = loads_line(f.read())["words"]
+            _dbg(verbose, f"[RECON] OCR cache hit  words={len(words)}")
+            return words
         except Exception as e:
-            _dbg(verbose, f"[RECON] EasyOCR unavailable ({e})")
+            _dbg(verbose, f"[RECON] OCR cache unreadable ({e}); re-running OCR")
 
-    # Tesseract (fallback / also union)
-    try:
-        import pytesseract
-        tcmd = cfg.get("ocr", {}).get("tesseract_cmd") or cfg.get("tesseract_cmd")
-        if tcmd:
-            pytesseract.pytesseract.tesseract_cmd = tcmd
-        langs = cfg.get("ocr", {}).get("tesseract_langs", ["eng"])
-        lang_str = "+".join(langs) if langs else "eng"
-        data = pytesseract.image_to_data(gray, lang=lang_str, config="--psm 6",
-                                         output_type=pytesseract.Output.DICT)
-        N = len(data.get("text", []))
-        twords = []
-        for i in range(N):
-            txt = (data["text"][i] or "").strip()
-            try:
-                conf = float(data["conf"][i]) / 100.0
-            except Exception:
-                conf = 0.0
-            x, y = int(data["left"][i]), int(data["top"][i])
-            w, h = int(data["width"][i]), int(data["height"][i])
-            if w*h <= 0: continue
-            twords.append({"box":[x,y,w,h], "text": txt, "conf": conf, "source":"tesseract"})
-        words.extend(twords)
-        _dbg(verbose, f"[RECON] OCR backend: tesseract  words={len(twords)}")
-    except Exception as e:
-        _dbg(verbose, f"[RECON] Tesseract unavailable ({e})")
+    backends = [b for b in _FULLPAGE_BACKENDS
+                if b[1] != "easyocr" or cfg.get("use_easyocr", False)]
+    words: List[Word] = []
 
+    ocr_cfg = cfg.get("ocr", {})
+    max_side = int(ocr_cfg.get("max_side", 1600))
+    scale = min(1.0, max_side / float(max(bgr.shape[:2]))) if max_side > 0 else 1.0
+    small, inv = bgr, 1.0
+    if scale < 1.0:
+        small = cv2.resize(bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        inv = bgr.shape[1] / float(small.shape[1])  # actual ratio after rounding
+        _dbg(verbose, f"[RECON] OCR input {bgr.shape[1]}x{bgr.shape[0]} -> {small.shape[1]}x{small.shape[0]}")
+    tess_full = bool(ocr_cfg.get("tess_full_res", True))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(backends), OCR_CONCURRENCY))) as ex:
+        futs = [(label, name, ex.submit(fn, bgr, cfg) if name == "tesseract" and tess_full
+                 else ex.submit(fn, small, cfg, inv))
+                for label, name, fn in backends]
+        for label, name, fut in futs:
+            try:
+                got = fut.result()
+            except Exception as e:
+                _dbg(verbose, f"[RECON] {label} unavailable ({e})")
+                continue
+            words.extend(got)
+            _dbg(verbose, f"[RECON] OCR backend: {name:<10} words={len(got)}")
+
+    # The backends mostly find the same words; keep the most confident copy
+    # so duplicates don't weigh on coverage or the words→bubbles fallback.
+    word_iou = float(cfg.get("reconcile", {}).get("word_nms_iou", 0.5))
+    if word_iou > 0 and len(words) > 1:
+        keep = nms_indices([w["box"] for w in words], iou_thresh=word_iou,
+                           scores=[float(w.get("conf") or 0.0) for w in words])
+        _dbg(verbose, f"[RECON] OCR duplicates dropped={len(words) - len(keep)}")
+        words = [words[i] for i in keep]
     _dbg(verbose, f"[RECON] TOTAL OCR words={len(words)}")
+    # empty results are not cached, so installing a backend takes effect next run
+    if cache_path and words:
+        try:
+            ensure_dir(os.path.dirname(cache_path))
+            tmp = f"{cache_path}.{os.getpid()}.tmp"
+            save_json(tmp, {"version": _OCR_CACHE_VERSION, "words": words})
+            os.replace(tmp, cache_path)  # atomic: parallel workers may race on a page
+        except OSError as e:
+            _dbg(verbose, f"[RECON] OCR cache not written ({e})")
     return words
 
 # ----------------------------- Fallback: words → bubbles ----------------------------- #
 
-def _bubbles_from_words(words_in_panel: List[Word], panel_box: Box, cfg: dict) -> List[Box]:
-    """Build bubble boxes from OCR words by dilating their rectangles (no extra deps)."""
-    if not words_in_panel:
+def _bubbles_from_words(word_boxes: np.ndarray, panel_box: Box, cfg: dict) -> List[Box]:
+    """Build bubble boxes from OCR word rects ((n, 4) x, y, w, h array) by dilating them (no extra deps)."""
+    if len(word_boxes) == 0:
         return []
     px, py, pw, ph = panel_box
 
-    # mask of panel; draw each word rect on it
-    mask = np.zeros((ph, pw), np.uint8)
-    heights = []
-    for w in words_in_panel:
-        x, y, ww, hh = map(int, w["box"])
-        heights.append(hh)
-        # shift into panel-local coords
-        x0 = max(0, x - px); y0 = max(0, y - py)
-        x1 = min(pw, x0 + ww); y1 = min(ph, y0 + hh)
-        if x1 > x0 and y1 > y0:
-            cv2.rectangle(mask, (x0, y0), (x1, y1), 255, -1)
+    wb = np.asarray(word_boxes, dtype=np.float64).astype(np.int64).reshape(-1, 4)
+    # shift into panel-local coords
+    x0 = np.maximum(0, wb[:, 0] - px); y0 = np.maximum(0, wb[:, 1] - py)
+    x1 = np.minimum(pw, x0 + wb[:, 2]); y1 = np.minimum(ph, y0 + wb[:, 3])
+    ok = (x1 > x0) & (y1 > y0)
+    if not ok.any():
+        return []
+    # filled rectangles include their far corner, hence the +1
+    x0, y0, x1, y1 = x0[ok], y0[ok], x1[ok] + 1, y1[ok] + 1
 
     # dilation size ~ text size
-    med_h = int(np.median(heights)) if heights else 12
+    med_h = int(np.median(wb[:, 3]))
     k = max(5, int(0.9 * med_h))
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (k, k))
+
+    # Dilation cost is per pixel, not per kernel size (OpenCV already runs a
+    # rectangular element as separate row/column passes), so only the words'
+    # extent plus the kernel reach is masked and dilated, not the whole panel.
+    # The margin keeps blobs off the window edge unless they touch the panel's.
+    # With reconcile.fallback_scale = s > 1 the mask is built at 1/s resolution
+    # (s² fewer pixels); blob rects are scaled back, padding stays native.
+    sc = max(1, int(cfg.get("reconcile", {}).get("fallback_scale", 1)))
+    m = k + sc
+    ox, oy = max(0, int(x0.min()) - m), max(0, int(y0.min()) - m)
+    ex, ey = min(pw, int(x1.max()) + m), min(ph, int(y1.max()) + m)
+    mask = np.zeros((-(-(ey - oy) // sc), -(-(ex - ox) // sc)), np.uint8)
+    # one clip for all words, then plain slice writes (~4x cheaper than cv2.rectangle per word)
+    for X0, Y0, X1, Y1 in zip(((x0 - ox) // sc).tolist(), ((y0 - oy) // sc).tolist(),
+                              (-(-(x1 - ox) // sc)).tolist(), (-(-(y1 - oy) // sc)).tolist()):
+        mask[Y0:Y1, X0:X1] = 255
+    kernel = morph.kernel(cv2.MORPH_RECT, k if sc == 1 else max(3, k // sc))
     dil = cv2.dilate(mask, kernel, iterations=1)
 
     # connected components → boxes
@@ -217,6 +332,7 @@ def _bubbles_from_words(words_in_panel: List[Word], panel_box: Box, cfg: dict) -
     out = []
     for c in cnts:
         x, y, w, h = cv2.boundingRect(c)
+        x, y, w, h = ox + x * sc, oy + y * sc, w * sc, h * sc
         # expand & clip to panel
         x0 = max(px, px + x - pad)
         y0 = max(py, py + y - pad)
@@ -229,10 +345,12 @@ def _bubbles_from_words(words_in_panel: List[Word], panel_box: Box, cfg: dict) -
 # ----------------------------- public API ----------------------------- #
 
 def reconcile_page(bgr, panel_boxes: List[Box], bubble_boxes: List[Box],
-                   cfg: dict, verbose: bool=False) -> List[Box]:
+                   cfg: dict, verbose: bool=False,
+                   priors: Optional[PagePriors]=None) -> List[Box]:
     """
     Run full-page OCR, compute per-panel word coverage, and selectively re-run
     bubble detection with relaxed settings. Optionally fall back to words→bubbles.
+    Pass the page's `PagePriors` to reuse maps from the first detection pass.
     """
     recon_cfg = cfg.get("reconcile", {})
     if not recon_cfg.get("enable", True):
@@ -247,44 +365,109 @@ def reconcile_page(bgr, panel_boxes: List[Box], bubble_boxes: List[Box],
     cov_thresh   = float(recon_cfg.get("coverage_thresh", 0.70))
     max_passes   = int(recon_cfg.get("max_passes", 2))
     do_fallback  = bool(recon_cfg.get("fallback_from_words", True))
+    fallback_min_words = int(recon_cfg.get("fallback_min_words", 2))
 
     final_bubbles = list(bubble_boxes)
+    # Index once, reuse per panel: word centers and the (panels × words)
+    # membership matrix are fixed for the page (panels may overlap, so a word
+    # can belong to several); bubble centers change only when NMS rewrites the
+    # list, so they are refreshed there rather than rescanned per panel.
+    # word rects as one (N, 4) array: the per-panel work below only slices it
+    wbox = np.asarray([w["box"] for w in words], dtype=np.float64).reshape(-1, 4)
+    wcx, wcy = _box_centers(wbox)
+    pa = np.asarray(panel_boxes, dtype=np.float64).reshape(-1, 4)
+    px0, py0 = pa[:, :1], pa[:, 1:2]
+    word_in_panel = ((wcx >= px0) & (wcx <= px0 + pa[:, 2:3]) &
+                     (wcy >= py0) & (wcy <= py0 + pa[:, 3:4]))
+    bcx, bcy = _box_centers(final_bubbles)
+
+    def _panel_bubbles(p: Box) -> List[Box]:
+        return [final_bubbles[i] for i in np.flatnonzero(_in_box(bcx, bcy, p))]
+
+    # The detector's boxes are not NMS'd across panels, so the first merge is a
+    # full pass; after that the list is an NMS output and new boxes only need
+    # checking against the ones they overlap (same result as the full pass).
+    nms_done = False
+
+    def _merge(new: List[Box]) -> int:
+        nonlocal bcx, bcy, nms_done
+        before = len(final_bubbles)
+        if nms_done:
+            final_bubbles[:] = nms_add(final_bubbles, new, iou_thresh=0.3)
+        else:
+            final_bubbles[:] = nms_boxes(final_bubbles + list(new), iou_thresh=0.3)
+            nms_done = True
+        bcx, bcy = _box_centers(final_bubbles)
+        return len(final_bubbles) - before
+
+    # Re-detection depends only on the panel and the relaxed config, so the
+    # first retry of every panel that starts under the threshold is started on
+    # a thread pool (cv2 releases the GIL) while earlier panels are merged.
+    # Merges stay in panel order; a prefetched result is used only if that
+    # panel still needs its retry, so the output matches the serial loop.
+    workers = max(1, cv2.getNumThreads())
+    prefetch: Dict[int, Future] = {}
+    pool = None
+    if workers > 1 and max_passes > 0:
+        weak = [pidx for pidx, p in enumerate(panel_boxes, start=1)
+                if word_in_panel[pidx - 1].any() and _coverage(wcx[word_in_panel[pidx - 1]], wcy[word_in_panel[pidx - 1]],
+                             _panel_bubbles(p)) < cov_thresh]
+        if weak:
+            if priors is None:
+                priors = PagePriors(bgr)
+            cfg_retry = _relax_cfg(cfg)
+            pool = ThreadPoolExecutor(max_workers=min(workers, len(weak)), thread_name_prefix="recon")
+            prefetch = {pidx: pool.submit(detect_bubbles_in_panel, bgr, panel_boxes[pidx - 1],
+                                          cfg_retry, priors=priors)
+                        for pidx in weak}
 
-    for pidx, p in enumerate(panel_boxes, start=1):
-        pb = [b for b in final_bubbles if _point_in_box(*_center(b), p)]
-        w_in = _words_in_box(words, p)
-        cov = _coverage(w_in, pb)
-        _dbg(verbose, f"[RECON] panel#{pidx} words={len(w_in):>3}  bubbles={len(pb):>2}  coverage={cov:.2f}")
-
-        passes = 0
-        cfg_try = cfg
-        while cov < cov_thresh and passes < max_passes:
-            passes += 1
-            _dbg(verbose, f"[RECON]   retry {passes}…")
-            cfg_try = _relax_cfg(cfg_try, verbose=verbose)
-            new = detect_bubbles_in_panel(bgr, p, cfg_try)
-            panel_new = [b for b in new if _point_in_box(*_center(b), p)]
-
-            before = len(final_bubbles)
-            final_bubbles.extend(panel_new)
-            final_bubbles[:] = nms_boxes(final_bubbles, iou_thresh=0.3)
-            added = len(final_bubbles) - before
-
-            pb = [b for b in final_bubbles if _point_in_box(*_center(b), p)]
-            cov = _coverage(w_in, pb)
-            _dbg(verbose, f"[RECON]     added_bubbles={added}  new_coverage={cov:.2f}")
-
-        # Fallback if still low coverage
-        if do_fallback and cov < cov_thresh:
-            fb = _bubbles_from_words(w_in, p, cfg)
-            if fb:
-                before = len(final_bubbles)
-                final_bubbles.extend(fb)
-                final_bubbles[:] = nms_boxes(final_bubbles, iou_thresh=0.3)
-                pb = [b for b in final_bubbles if _point_in_box(*_center(b), p)]
-                cov = _coverage(w_in, pb)
-                added = len(final_bubbles) - before
-                _dbg(verbose, f"[RECON]   fallback words→bubbles={added}  new_coverage={cov:.2f}")
+    try:
+        for pidx, p in enumerate(panel_boxes, start=1):
+            w_mask = word_in_panel[pidx - 1]
+            if not w_mask.any():
+                # no text → nothing to cover: no retries, no fallback
+                _dbg(verbose, f"[RECON] panel#{pidx} words=  0  (skipped)")
+                continue
+            pb = _panel_bubbles(p)
+            n_words = int(np.count_nonzero(w_mask))
+            w_cx, w_cy = wcx[w_mask], wcy[w_mask]
+            cov = _coverage(w_cx, w_cy, pb)
+            _dbg(verbose, f"[RECON] panel#{pidx} words={n_words:>3}  bubbles={len(pb):>2}  coverage={cov:.2f}")
+            if cov >= cov_thresh:
+                continue
+
+            passes = 0
+            cfg_try = cfg
+            while cov < cov_thresh and passes < max_passes:
+                passes += 1
+                _dbg(verbose, f"[RECON]   retry {passes}…")
+                cfg_try = _relax_cfg(cfg_try, verbose=verbose)
+                fut = prefetch.pop(pidx, None) if passes == 1 else None
+                if fut is not None:
+                    new = fut.result()
+                else:
+                    if priors is None:
+                        priors = PagePriors(bgr)
+                    new = detect_bubbles_in_panel(bgr, p, cfg_try, priors=priors)
+                panel_new = _boxes_in(new, p)
+
+                added = _merge(panel_new)
+
+                pb = _panel_bubbles(p)
+                cov = _coverage(w_cx, w_cy, pb)
+                _dbg(verbose, f"[RECON]     added_bubbles={added}  new_coverage={cov:.2f}")
+
+            # Fallback if still low coverage (a lone stray word doesn't make a bubble)
+            if do_fallback and cov < cov_thresh and n_words >= fallback_min_words:
+                fb = _bubbles_from_words(wbox[w_mask], p, cfg)
+                if fb:
+                    added = _merge(fb)
+                    pb = _panel_bubbles(p)
+                    cov = _coverage(w_cx, w_cy, pb)
+                    _dbg(verbose, f"[RECON]   fallback words→bubbles={added}  new_coverage={cov:.2f}")
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
 
     final_bubbles = nms_boxes(final_bubbles, iou_thresh=0.3)
     _dbg(verbose, f"[RECON] done. total_bubbles={len(final_bubbles)}")
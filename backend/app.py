@@ -1,16 +1,16 @@
-import os, re
+import functools, shutil, time, types
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
 
-from backend.models import RunRequest
-from backend.app import run_pipeline
+from backend.models import RES_ADAPTER, RunRequest
+from backend.process import run_pipeline_async
 from backend.settings import (
-    PROJECT_ROOT, BP_ROOT, UPLOAD_DIR, map_ui_upload_path, norm
+    PROJECT_ROOT, BP_ROOT, UPLOAD_DIR, PY_EXE, SCRIPT, map_ui_inputs, norm
 )
+from backend.web import DefaultJSONResponse, dumps, file_response, save_upload
 
-app = FastAPI(title="BubblePanel API", version="1.4")
+app = FastAPI(title="BubblePanel API", version="1.4", default_response_class=DefaultJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,76 +28,86 @@ def root():
 def health():
     return {"ok": True}
 
+@functools.lru_cache(maxsize=8)
+def _on_path(exe: str) -> bool:
+    """`which exe` without forking a shell; PATH doesn't change while we run."""
+    return shutil.which(exe) is not None
+
+# /status and /presets are polled by dashboards/health checks: /status is
+# rebuilt at most every _STATUS_TTL seconds (it stats files), /presets is a
+# constant; both tell clients how long they may cache the response.
+_STATUS_TTL = 10
+
 @app.get("/status")
-def status():
-    script = os.environ.get("BP_SCRIPT", "smoke_test.py")
-    pyexe  = os.environ.get("BP_PYTHON", "python")
+def status(response: Response):
+    response.headers["Cache-Control"] = f"max-age={_STATUS_TTL}"
+    return _status_body(int(time.monotonic() // _STATUS_TTL))
+
+@functools.lru_cache(maxsize=1)
+def _status_body(_bucket: int) -> dict:
     return {
         "ok": True,
-        "python": pyexe,
-        "python_exists": (os.system(f"which {pyexe} > /dev/null 2>&1") == 0),
+        "python": PY_EXE,
+        "python_exists": _on_path(PY_EXE),
         "project_root": str(PROJECT_ROOT),
         "bp_root": str(BP_ROOT),
         "upload_dir": str(UPLOAD_DIR),
-        "script": script,
-        "script_exists_under_bp_root": (BP_ROOT / script).is_file(),
+        "script": SCRIPT,
+        "script_exists_under_bp_root": (BP_ROOT / SCRIPT).is_file(),
     }
 
+_PRESETS = types.MappingProxyType({
+    "llm_paragraph_qwen": {
+        "page_style": "paragraph",
+        "engine": "llm",
+        "ollama_text": "qwen2.5:7b-instruct",
+    },
+    "llm_novel_qwen": {
+        "page_style": "novel",
+        "engine": "llm",
+        "ollama_text": "qwen2.5:7b-instruct",
+    },
+    "encoder_paragraph_mpnet": {
+        "page_style": "paragraph",
+        "engine": "encoder",
+        "embed_model": "sentence-transformers/all-mpnet-base-v2",
+        "mlm_refiner": True,
+    },
+    "llm_paragraph_llama": {
+        "page_style": "paragraph",
+        "engine": "llm",
+        "ollama_text": "llama3.1:latest",
+    },
+})
+_PRESETS_JSON = dumps(dict(_PRESETS))  # encoded once, not per request
+
 @app.get("/presets")
 def presets():
-    return {
-        "llm_paragraph_qwen": {
-            "page_style": "paragraph",
-            "engine": "llm",
-            "ollama_text": "qwen2.5:7b-instruct",
-        },
-        "llm_novel_qwen": {
-            "page_style": "novel",
-            "engine": "llm",
-            "ollama_text": "qwen2.5:7b-instruct",
-        },
-        "encoder_paragraph_mpnet": {
-            "page_style": "paragraph",
-            "engine": "encoder",
-            "embed_model": "sentence-transformers/all-mpnet-base-v2",
-            "mlm_refiner": True,
-        },
-        "llm_paragraph_llama": {
-            "page_style": "paragraph",
-            "engine": "llm",
-            "ollama_text": "llama3.1:latest",
-        },
-    }
+    return Response(_PRESETS_JSON, media_type="application/json",
+                    headers={"Cache-Control": "max-age=3600"})
 
 # ---------- Upload ----------
-_SAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
-
-def _safe_name(name: str) -> str:
-    base = _SAFE_RE.sub("_", name or "")
-    return base or "upload"
-
+# Plain `def`: FastAPI runs it in the threadpool, and the (already spooled)
+# upload is copied to disk in 1 MiB chunks instead of read whole into RAM.
 @app.post("/upload")
-async def upload(file: UploadFile = File(...)):
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    dest = UPLOAD_DIR / _safe_name(file.filename)
-    with dest.open("wb") as f:
-        f.write(await file.read())
+def upload(file: UploadFile = File(...)):
+    dest = save_upload(file)
     # Return both absolute and "UI" path
     return {
         "ok": True,
-        "path": str(dest.resolve()),
+        "path": str(dest),
         "ui_path": f"/app/uploads/{dest.name}",
         "filename": file.filename,
     }
 
 # ---------- Run pipeline ----------
 @app.post("/run")
-def run(req: RunRequest):
+async def run(req: RunRequest):
     # Normalize paths from UI
-    # input can be absolute, /app/uploads/<name>, or relative to BP_ROOT
-    inp = map_ui_upload_path(req.input)
-    if not inp.exists():
-        raise HTTPException(status_code=400, detail=f"Input not found: {inp}")
+    # input can be absolute, /app/uploads/<name>, or relative to BP_ROOT (or a list of those)
+    inp, missing = map_ui_inputs(req.input)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Input not found: {', '.join(missing)}")
 
     # Normalize output path: allow relative under BP_ROOT
     out_norm = norm(req.out) or "./data/outputs/job"
@@ -108,22 +118,17 @@ def run(req: RunRequest):
     # Normalize jsonl location the same way if it's relative
     jsonl_norm = norm(req.jsonl) or "panels.jsonl"
     if not Path(jsonl_norm).is_absolute():
-        req.jsonl = str((out_path / Path(jsonl_norm).name).resolve())
-    else:
-        req.jsonl = jsonl_norm
+        jsonl_norm = str((out_path / Path(jsonl_norm).name).resolve())
 
-    # rewrite req fields with normalized paths
-    req.input = str(inp)
-    req.out   = str(out_path)
+    # rewrite req fields with normalized paths (model_copy: no re-validation)
+    req = req.model_copy(update={"input": inp, "out": str(out_path), "jsonl": jsonl_norm})
 
-    result = run_pipeline(req)
-    return result.model_dump()
+    result = await run_pipeline_async(req)
+    return Response(RES_ADAPTER.dump_json(result), media_type="application/json")
 
 # ---------- Serve output artifacts ----------
 @app.get("/file")
-def get_file(path: str):
+def get_file(path: str, request: Request):
     # For convenience; lock down in prod
-    if not os.path.isfile(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path)
+    return file_response(path, request)
 #
\ No newline at end of file
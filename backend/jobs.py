@@ -0,0 +1,172 @@
+# backend/jobs.py — job records for the async /run API (SQLite + hot map, or Redis)
+"""
+Job status store shared by POST /run and GET /run/{id}.
+
+Records live in SQLite, so memory no longer grows with every finished job and
+several API processes pointed at the same file see the same jobs. The most
+recently touched records are also kept in a bounded in-process LRU, so polling
+a job this process is running does not hit the database.
+
+With BP_REDIS_URL set (and the `redis` package installed) records go to Redis
+instead, one hash per job with a TTL, so any number of API processes or hosts
+behind a load balancer share them without a common filesystem.
+
+Environment:
+  BP_REDIS_URL   e.g. redis://localhost:6379/0 (default: unset → SQLite)
+  BP_JOBS_DB     SQLite file (default: <repo>/data/jobs.db)
+  BP_JOB_TTL     seconds a finished job is kept (default: 3600)
+  BP_JOBS_HOT    records kept in memory (default: 256)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from backend.settings import PROJECT_ROOT
+
+_REDIS_URL = os.environ.get("BP_REDIS_URL", "")
+_DB_PATH = os.environ.get("BP_JOBS_DB", str(PROJECT_ROOT / "data" / "jobs.db"))
+_TTL = int(os.environ.get("BP_JOB_TTL", "3600"))
+_HOT = int(os.environ.get("BP_JOBS_HOT", "256"))
+_SWEEP_EVERY = 60  # seconds between expiry sweeps
+_STALE_TTL = 24 * 3600  # Redis expiry for queued/running jobs (orphans of a dead worker)
+
+_FIELDS = ("status", "queued", "started", "ended", "result", "error")
+_FINAL = ("done", "error")  # records that can no longer change
+
+
+class JobStore:
+    """Thread-safe job records: {"status", "queued"|"started"|"ended", "result"|"error"}."""
+
+    def __init__(self, path: str = _DB_PATH, ttl: int = _TTL, hot: int = _HOT):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl, self.hot = ttl, hot
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+            " queued REAL, started REAL, ended REAL, result TEXT, error TEXT)"
+        )
+        if "queued" not in {r[1] for r in self._db.execute("PRAGMA table_info(jobs)")}:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN queued REAL")  # files from before the job queue
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ended ON jobs(ended)")
+        self._closed = threading.Event()
+        threading.Thread(target=self._sweeper, name="jobs-sweep", daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the sweeper and close the database."""
+        self._closed.set()
+        with self._lock:
+            self._db.close()
+
+    def _remember(self, job_id: str, rec: Dict[str, Any]) -> None:
+        self._mem[job_id] = rec
+        self._mem.move_to_end(job_id)
+        while len(self._mem) > self.hot:
+            self._mem.popitem(last=False)
+
+    def put(self, job_id: str, rec: Dict[str, Any]) -> None:
+        """Replace the job's record (fields absent from `rec` are cleared)."""
+        result = rec.get("result")
+        row = (job_id, rec["status"], rec.get("queued"), rec.get("started"), rec.get("ended"),
+               None if result is None else json.dumps(result, ensure_ascii=False), rec.get("error"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, queued, started, ended, result, error)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self._remember(job_id, dict(rec))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            rec = self._mem.get(job_id)
+            if rec is not None and rec["status"] in _FINAL:
+                self._mem.move_to_end(job_id)
+                return rec
+            # queued/running jobs may be advanced by another process: re-read those
+            row = self._db.execute(
+                "SELECT status, queued, started, ended, result, error FROM jobs WHERE id=?", (job_id,)
+            ).fetchone()
+            if row is None:
+                self._mem.pop(job_id, None)
+                return None
+            rec = {k: v for k, v in zip(_FIELDS, row) if v is not None}
+            if "result" in rec:
+                rec["result"] = json.loads(rec["result"])
+            self._remember(job_id, rec)
+            return rec
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop finished jobs older than the TTL; returns how many were removed."""
+        cutoff = (time.time() if now is None else now) - self.ttl
+        with self._lock:
+            n = self._db.execute("DELETE FROM jobs WHERE ended IS NOT NULL AND ended < ?", (cutoff,)).rowcount
+            for job_id in [k for k, r in self._mem.items() if r.get("ended") is not None and r["ended"] < cutoff]:
+                del self._mem[job_id]
+        return n
+
+    def _sweeper(self) -> None:
+        while not self._closed.wait(_SWEEP_EVERY):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[jobs] sweep failed: {e}")
+
+
+class RedisJobStore:
+    """JobStore on Redis: hash `job:<id>`, expiring BP_JOB_TTL after the job ends."""
+
+    def __init__(self, url: str = _REDIS_URL, ttl: int = _TTL):
+        import redis  # optional dependency, only needed with BP_REDIS_URL
+        self.ttl = ttl
+        self._r = redis.Redis.from_url(url, decode_responses=True)
+        self._r.ping()
+
+    def put(self, job_id: str, rec: Dict[str, Any]) -> None:
+        """Replace the job's record (fields absent from `rec` are cleared)."""
+        key = f"job:{job_id}"
+        mapping = {k: (json.dumps(v, ensure_ascii=False) if k == "result" else v)
+                   for k, v in rec.items() if v is not None}
+        pipe = self._r.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, self.ttl if rec["status"] in _FINAL else _STALE_TTL)
+        pipe.execute()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        h = self._r.hgetall(f"job:{job_id}")
+        if not h:
+            return None
+        rec: Dict[str, Any] = {}
+        for k in _FIELDS:
+            if k not in h:
+                continue
+            v = h[k]
+            if k in ("queued", "started", "ended"):
+                v = float(v)
+            elif k == "result":
+                v = json.loads(v)
+            rec[k] = v
+        return rec
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        return 0  # Redis expires keys itself
+
+    def close(self) -> None:
+        self._r.close()
+
+
+def make_job_store():
+    """RedisJobStore when BP_REDIS_URL is set and reachable, else the SQLite JobStore."""
+    if _REDIS_URL:
+        try:
+            return RedisJobStore()
+        except Exception as e:
+            print(f"[jobs] Redis unavailable ({e}); using SQLite at {_DB_PATH}")
+    return JobStore()
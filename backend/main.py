@@ -1,49 +1,30 @@
 # backend/main.py  — ASYNC jobs version (POST /run enqueues; GET /run/{id} polls)
 
-import os, re, uuid, threading, time
+import asyncio, functools, os, uuid, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Set
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import anyio.to_thread
+
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from pydantic import ValidationError
 
-from backend.models import RunRequest
-from backend.process import run_pipeline
+from backend.jobs import make_job_store
+from backend.models import REQ_VALIDATOR, RunRequest
+from backend.process import run_pipeline_async, start_workers, stop_workers
+from backend.settings import BP_ROOT, SCRIPT, UPLOAD_DIR, map_ui_inputs
+from backend.web import DefaultJSONResponse, dumps, file_response, save_upload
 
 # ------------------ paths & helpers ------------------
 
-BP_ROOT = Path(os.environ.get("BP_REPO_ROOT", str(Path.cwd() / "BubblePanel-main"))).resolve()
-UPLOAD_DIR = Path(os.environ.get("BP_UPLOAD_DIR", str(Path.cwd() / "uploads"))).resolve()
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-_SAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
-
-def _safe(name: str) -> str:
-    s = _SAFE_RE.sub("_", name or "")
-    return s or "upload"
-
-def _map_ui_upload_path(p: str) -> Path:
-    """
-    Convert a UI path to a server filesystem path.
-    - '/app/uploads/<file>' -> UPLOAD_DIR/<file>
-    - absolute path         -> unchanged
-    - relative              -> resolve under BP_ROOT
-    """
-    if not p:
-        return Path("")
-    p = p.strip()
-    if p.startswith("/app/uploads/"):
-        return (UPLOAD_DIR / Path(p).name).resolve()
-    path = Path(p)
-    if path.is_absolute():
-        return path.resolve()
-    return (BP_ROOT / p.lstrip("./")).resolve()
-
 def _normalize_paths(req: RunRequest) -> RunRequest:
-    inp = _map_ui_upload_path(req.input)
-    if not inp.exists():
-        raise HTTPException(400, f"Input not found: {inp}")
+    inp, missing = map_ui_inputs(req.input)
+    if missing:
+        raise HTTPException(400, f"Input not found: {', '.join(missing)}")
 
     out_dir = req.out or "./data/outputs/job"
     out_path = Path(out_dir)
@@ -56,18 +37,35 @@ def _normalize_paths(req: RunRequest) -> RunRequest:
     if not jsonl_path.is_absolute():
         jsonl_path = (out_path / jsonl_path.name).resolve()
 
+    update = {"input": inp, "out": str(out_path), "jsonl": str(jsonl_path)}
     # If no real LLM host+model, keep OCR-only to avoid hitting localhost:11434
     if not (req.engine == "llm" and req.host and req.ollama_text):
-        req.page_summarize = False
-
-    req.input = str(inp)
-    req.out   = str(out_path)
-    req.jsonl = str(jsonl_path)
-    return req
+        update["page_summarize"] = False
+    return req.model_copy(update=update)
 
 # ------------------ FastAPI app ------------------
 
-app = FastAPI(title="BubblePanel API", version="2.0-async")
+# Blocking work (plain-def endpoints on anyio's pool, SQLite writes via
+# asyncio.to_thread) gets BP_THREADS threads in each pool instead of the
+# defaults (40 and cpu+4), so a burst of uploads/polls can't oversubscribe the box.
+BP_THREADS = max(1, int(os.environ.get("BP_THREADS", "8")))
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(BP_THREADS, thread_name_prefix="bp-io"))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = BP_THREADS
+    global JOBS
+    JOBS = await asyncio.to_thread(make_job_store)
+    await start_workers()  # persistent pipeline workers when BP_WORKERS > 0
+    try:
+        yield
+    finally:
+        await stop_workers()
+        JOBS.close()
+
+app = FastAPI(title="BubblePanel API", version="2.0-async", lifespan=_lifespan,
+              default_response_class=DefaultJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -85,52 +83,124 @@ def root():
 def health():
     return {"ok": True}
 
+# Polled by health checks: rebuilt at most every _STATUS_TTL seconds (it stats
+# the script) and marked cacheable for as long.
+_STATUS_TTL = 10
+
 @app.get("/status")
-def status():
-    script = os.environ.get("BP_SCRIPT", "smoke_test.py")
+def status(response: Response):
+    response.headers["Cache-Control"] = f"max-age={_STATUS_TTL}"
+    return _status_body(int(time.monotonic() // _STATUS_TTL))
+
+@functools.lru_cache(maxsize=1)
+def _status_body(_bucket: int) -> dict:
     return {
         "ok": True,
         "bp_root": str(BP_ROOT),
         "upload_dir": str(UPLOAD_DIR),
-        "script": script,
-        "script_exists": (BP_ROOT / script).is_file(),
+        "script": SCRIPT,
+        "script_exists": (BP_ROOT / SCRIPT).is_file(),
     }
 
+# sync handler (threadpool) + chunked copy: the upload is never held whole in RAM
 @app.post("/upload")
-async def upload(file: UploadFile = File(...)):
-    dest = UPLOAD_DIR / _safe(file.filename or "upload")
-    with dest.open("wb") as f:
-        f.write(await file.read())
-    return {"ok": True, "path": str(dest.resolve()), "ui_path": f"/app/uploads/{dest.name}", "filename": file.filename}
+def upload(file: UploadFile = File(...)):
+    dest = save_upload(file)
+    return {"ok": True, "path": str(dest), "ui_path": f"/app/uploads/{dest.name}", "filename": file.filename}
 
 @app.get("/file")
-def get_file(path: str):
-    if not os.path.isfile(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path)
-
-# ------------------ ASYNC RUN: POST /run (enqueue) + GET /run/{id} (poll) ------------------
-
-JOBS: Dict[str, Dict[str, Any]] = {}
-
-def _job_worker(job_id: str, req: RunRequest):
-    JOBS[job_id] = {"status": "running", "started": time.time()}
+def get_file(path: str, request: Request):
+    return file_response(path, request)
+
+# ------------------ ASYNC RUN: POST /run (enqueue) + GET /run/{id} (poll / long-poll) ------------------
+
+# Redis (BP_REDIS_URL) or SQLite (BP_JOBS_DB); finished jobs expire after BP_JOB_TTL.
+# Opened by _lifespan, so importing this module creates no files or threads.
+JOBS = None
+
+# Each pipeline run is heavy (models, OCR, LLM calls): at most BP_MAX_JOBS run
+# at once and BP_MAX_PENDING are accepted (running + queued); beyond that
+# POST /run answers 503 instead of slowing every job down.
+MAX_JOBS = max(1, int(os.environ.get("BP_MAX_JOBS", "2")))
+MAX_PENDING = max(MAX_JOBS, int(os.environ.get("BP_MAX_PENDING", "8")))
+_RUNNING = asyncio.Semaphore(MAX_JOBS)
+_pending = 0                  # only touched on the event loop
+_TASKS: Set[asyncio.Task] = set()  # strong refs until each job finishes
+_DONE: Dict[str, asyncio.Event] = {}  # set when a job of this process finishes (long-poll)
+_MAX_WAIT = 25.0  # cap on GET /run/{id}?wait=, below common proxy timeouts
+
+# Jobs are tasks on the event loop: the pipeline is a child process awaited via
+# asyncio (run_pipeline_async), so no thread is parked per job. SQLite writes
+# go through asyncio.to_thread to keep the loop free.
+async def _job_worker(job_id: str, req: RunRequest):
+    global _pending
+    try:
+        async with _RUNNING:
+            await asyncio.to_thread(JOBS.put, job_id, {"status": "running", "started": time.time()})
+            try:
+                res = await run_pipeline_async(req)
+                rec = {"status": "done", "result": res.model_dump(), "ended": time.time()}
+            except Exception as e:
+                rec = {"status": "error", "error": str(e), "ended": time.time()}
+            await asyncio.to_thread(JOBS.put, job_id, rec)
+    finally:
+        _pending -= 1
+        ev = _DONE.pop(job_id, None)
+        if ev is not None:
+            ev.set()
+
+# The body is validated straight from its bytes by pydantic-core
+# (REQ_VALIDATOR.validate_json) instead of FastAPI's json.loads → dict → validate; the
+# schema is still published for /docs, and errors are the usual 422.
+_RUN_BODY = {"requestBody": {"required": True,
+                             "content": {"application/json": {"schema": RunRequest.model_json_schema()}}}}
+
+async def _read_run_request(request: Request) -> RunRequest:
     try:
-        res = run_pipeline(req)
-        JOBS[job_id] = {"status": "done", "result": res.model_dump(), "ended": time.time()}
-    except Exception as e:
-        JOBS[job_id] = {"status": "error", "error": str(e), "ended": time.time()}
-
-@app.post("/run")
-def run_enqueue(req: RunRequest):
-    req = _normalize_paths(req)
+        return REQ_VALIDATOR.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)])
+
+@app.post("/run", openapi_extra=_RUN_BODY)
+async def run_enqueue(request: Request):
+    global _pending
+    req = _normalize_paths(await _read_run_request(request))
+    if _pending >= MAX_PENDING:
+        raise HTTPException(503, "Server busy, try again later", headers={"Retry-After": "30"})
+    _pending += 1
     job_id = uuid.uuid4().hex[:12]
-    threading.Thread(target=_job_worker, args=(job_id, req), daemon=True).start()
+    try:
+        # recorded before the task starts, so an immediate poll never sees 404
+        await asyncio.to_thread(JOBS.put, job_id, {"status": "queued", "queued": time.time()})
+    except BaseException:
+        _pending -= 1
+        raise
+    _DONE[job_id] = asyncio.Event()
+    task = asyncio.create_task(_job_worker(job_id, req))
+    _TASKS.add(task)
+    task.add_done_callback(_TASKS.discard)
     return {"ok": True, "id": job_id}  # returns in <100ms (Netlify-safe)
 
+def _job_response(job: dict) -> Response:
+    # records are plain JSON values already: skip jsonable_encoder's walk
+    return Response(dumps(job), media_type="application/json")
+
+# With ?wait=N a queued/running job's poll is held until the job finishes or N
+# seconds pass (long-poll), so a client needs one request per ~N s instead of
+# one per poll interval. Only jobs started by this process can be awaited;
+# others answer immediately, as does wait=0 (the default).
 @app.get("/run/{job_id}")
-def run_status(job_id: str):
-    job = JOBS.get(job_id)
+async def run_status(job_id: str, wait: float = 0):
+    job = await asyncio.to_thread(JOBS.get, job_id)
     if not job:
         raise HTTPException(404, "Unknown job id")
-    return job
+    ev = _DONE.get(job_id)
+    if wait > 0 and ev is not None and job["status"] not in ("done", "error"):
+        try:
+            await asyncio.wait_for(ev.wait(), timeout=min(wait, _MAX_WAIT))
+        except asyncio.TimeoutError:
+            return _job_response(job)
+        job = await asyncio.to_thread(JOBS.get, job_id) or job
+    return _job_response(job)
+
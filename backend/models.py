@@ -1,10 +1,18 @@
-from pydantic import BaseModel
-from typing import Literal, Optional, List
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing import Literal, Optional, List, Union
+
+_FROZEN = ConfigDict(frozen=True, extra="forbid", revalidate_instances="never")
 
 
 class RunRequest(BaseModel):
+    # Validated once when the body is parsed and immutable afterwards: the
+    # server's path normalization uses model_copy(update=...), which does not
+    # re-validate. Unknown fields are rejected (422) rather than silently
+    # dropped, so a misspelled option can't be mistaken for a default.
+    model_config = _FROZEN
+
     # IO
-    input: str                     # server-side path or /app/uploads/<file>
+    input: Union[str, List[str]]   # server-side path or /app/uploads/<file>; a list is run as one batch
     out: str                       # output dir (relative to BubblePanel-main or absolute)
     jsonl: str = "panels.jsonl"    # will be placed under 'out' if relative
 
@@ -34,6 +42,9 @@ class RunRequest(BaseModel):
 
 
 class RunResult(BaseModel):
+    # built by the server with model_construct (backend/process.py)
+    model_config = _FROZEN
+
     ok: bool
     command: str
     stdout: str
@@ -42,3 +53,10 @@ class RunResult(BaseModel):
     overlays: List[str]
     text_files: List[str]
     jsonls: List[str]
+
+
+# Built once: validate request bodies from raw JSON bytes (RunRequest's own
+# pydantic-core validator, called directly: one Rust call per body) and dump
+# results to JSON bytes without the per-call classmethod dispatch.
+REQ_VALIDATOR = RunRequest.__pydantic_validator__
+RES_ADAPTER = TypeAdapter(RunResult)
@@ -1,25 +1,53 @@
-import os, shlex, subprocess, glob
+import asyncio, json, os, shlex, subprocess, tempfile
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from backend.models import RunRequest, RunResult
-from backend.settings import BP_ROOT
+from backend.settings import BP_ROOT, PY_EXE, SCRIPT, TIMEOUT
 
-# File globs we will return to the UI
-EXT_OVERLAYS = ("*_panels.png", "*_bubbles.png")
-EXT_TEXTS    = ("*_text.txt",)
-EXT_JSONLS   = ("*.jsonl",)
+# Output files we return to the UI: (name suffix, result field), in result order
+_SUFFIXES = (
+    ("_panels.png",  "overlays"),
+    ("_bubbles.png", "overlays"),
+    ("_text.txt",    "text_files"),
+    (".jsonl",       "jsonls"),
+)
 
 
-def _collect(out_dir: str, patterns: tuple[str, ...]) -> list[str]:
-    found: list[str] = []
-    for pat in patterns:
-        found.extend(sorted(glob.glob(os.path.join(out_dir, pat))))
+def _collect(out_dir: str) -> dict[str, list[str]]:
+    """One scandir pass over out_dir; per field, files grouped by suffix in table order, sorted."""
+    groups: list[list[str]] = [[] for _ in _SUFFIXES]
+    try:
+        with os.scandir(out_dir) as it:
+            for e in it:
+                if e.name.startswith("."):  # like glob's "*"
+                    continue
+                for i, (suf, _) in enumerate(_SUFFIXES):
+                    if e.name.endswith(suf):
+                        groups[i].append(e.path)
+                        break
+    except FileNotFoundError:
+        pass
+    found: dict[str, list[str]] = {"overlays": [], "text_files": [], "jsonls": []}
+    for (_, field), paths in zip(_SUFFIXES, groups):
+        found[field].extend(sorted(paths))
     return found
 
 
+_CMD = (PY_EXE, SCRIPT)  # BP_PYTHON, BP_SCRIPT
+
+# RunRequest booleans passed through as bare CLI switches, in argv order
+_BOOL_FLAGS = (
+    ("recon_verbose", "--recon-verbose"),
+    ("save_crops",    "--save-crops"),
+    ("all_ocr",       "--all-ocr"),
+    ("ocr_verbose",   "--ocr-verbose"),
+    ("no_ocr",        "--no-ocr"),
+)
+
+
 def _build_args(req: RunRequest) -> List[str]:
-    args = ["python", "smoke_test.py", "--input", req.input, "--out", req.out, "--jsonl", req.jsonl]
+    args = [*_CMD, "--input", req.input, "--out", req.out, "--jsonl", req.jsonl]
 
     if req.page_summarize:
         args += ["--page-summarize"]
@@ -34,67 +62,243 @@ def _build_args(req: RunRequest) -> List[str]:
         if req.mlm_refiner:
             args += ["--mlm-refiner"]
 
-    if req.recon_verbose: args += ["--recon-verbose"]
-    if req.save_crops:    args += ["--save-crops"]
-    if req.all_ocr:       args += ["--all-ocr"]
-    if req.ocr_verbose:   args += ["--ocr-verbose"]
-    if req.no_ocr:        args += ["--no-ocr"]
+    args.extend(flag for attr, flag in _BOOL_FLAGS if getattr(req, attr))
 
     return args
 
 
-def run_pipeline(req: RunRequest) -> RunResult:
+# A batch (RunRequest.input is a list) runs as ONE smoke_test.py invocation:
+# the list is written to a per-job JSON manifest in the output folder, which is
+# passed as --input (smoke_test expands it in list order, keeping each image's
+# own path and name) and removed after the run.
+_MANIFEST_PREFIX = ".batch-"  # dot file: not collected as an output
+
+
+def _write_manifest(inputs: List[str], out_dir: str) -> str:
+    fd, path = tempfile.mkstemp(prefix=_MANIFEST_PREFIX, suffix=".json", dir=out_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(inputs, f, ensure_ascii=False)
+    return path
+
+
+def _prepare(req: RunRequest):
+    """
+    (args, printable command, child env, timeout seconds, batch manifest or
+    None) for one run. A dry run writes no manifest.
+    """
     # Ensure output dir exists
     os.makedirs(req.out, exist_ok=True)
+    manifest = None
+    if isinstance(req.input, list):
+        if req.dry_run:
+            inp = os.path.join(req.out, _MANIFEST_PREFIX + "XXXXXXXX.json")
+        else:
+            inp = manifest = _write_manifest(req.input, req.out)
+        req = req.model_copy(update={"input": inp})
 
     args = _build_args(req)
     cmd_str = " ".join(shlex.quote(a) for a in args)
 
-    # UTF-8 environment for child process
-    run_env = os.environ.copy()
-    run_env.setdefault("PYTHONIOENCODING", "utf-8")
-    run_env.setdefault("LC_ALL", "C.UTF-8")
-    run_env.setdefault("LANG", "C.UTF-8")
+    # Timeout selection: request > BP_TIMEOUT > default (1200s)
+    timeout_sec = req.timeout_seconds or TIMEOUT
+    return args, cmd_str, _CHILD_ENV, timeout_sec, manifest
+
+
+def _drop_manifest(manifest: Optional[str]) -> None:
+    if manifest is not None:
+        try:
+            os.remove(manifest)
+        except OSError:
+            pass
+
+
+# UTF-8 environment for child processes: built once from the server's env
+# (explicit settings win), shared read-only by every run.
+_CHILD_ENV = {"PYTHONIOENCODING": "utf-8", "LC_ALL": "C.UTF-8", "LANG": "C.UTF-8", **os.environ}
+
+
+def _dry_run(req: RunRequest, cmd_str: str) -> RunResult:
+    return RunResult.model_construct(  # trusted internal data; skip validation
+        ok=True,
+        command=cmd_str,
+        stdout=f"(dry_run) cwd={BP_ROOT}",
+        stderr="",
+        out_dir=req.out,
+        overlays=[],
+        text_files=[],
+        jsonls=[]
+    )
 
-    # Timeout selection: request > env > default (600s)
-    timeout_sec = req.timeout_seconds or int(os.getenv("BP_TIMEOUT", "1200"))
 
+def _result(req: RunRequest, cmd_str: str, returncode: int, stdout: str, stderr: str) -> RunResult:
+    return RunResult.model_construct(  # trusted internal data; skip validation
+        ok=(returncode == 0),
+        command=cmd_str,
+        stdout=stdout,
+        stderr=stderr,
+        out_dir=req.out,
+        **_collect(req.out),
+    )
+
+
+def run_pipeline(req: RunRequest) -> RunResult:
+    args, cmd_str, run_env, timeout_sec, manifest = _prepare(req)
     if req.dry_run:
-        return RunResult(
-            ok=True,
-            command=cmd_str,
-            stdout=f"(dry_run) cwd={BP_ROOT}",
-            stderr="",
-            out_dir=req.out,
-            overlays=[],
-            text_files=[],
-            jsonls=[]
-        )
+        return _dry_run(req, cmd_str)
 
     # Run the pipeline inside BubblePanel-main/
-    proc = subprocess.run(
-        args,
+    try:
+        proc = subprocess.run(
+            args,
+            cwd=str(BP_ROOT),
+            capture_output=True,
+            shell=False,
+            env=run_env,
+            timeout=timeout_sec,
+        )
+    finally:
+        _drop_manifest(manifest)
+    return _result(req, cmd_str, proc.returncode, _text(proc.stdout), _text(proc.stderr))
+
+
+# The UI gets the last _TAIL_CHARS characters of each stream. UTF-8 needs at
+# most 4 bytes per character, so only the last _TAIL_BYTES bytes are decoded
+# (a character cut at the front decodes to U+FFFD and is sliced off).
+_TAIL_CHARS = 50_000
+_TAIL_BYTES = 4 * _TAIL_CHARS + 4
+
+
+def _text(b: bytes) -> str:
+    # same decoding as subprocess.run(text=True, errors="replace"): universal newlines
+    return _clip(b[-_TAIL_BYTES:].decode("utf-8", errors="replace"))
+
+
+def _clip(s: str) -> str:
+    return s.replace("\r\n", "\n").replace("\r", "\n")[-_TAIL_CHARS:]
+
+
+async def _tail(stream: asyncio.StreamReader) -> bytes:
+    """Read a pipe to EOF, keeping only its last _TAIL_BYTES bytes."""
+    buf = bytearray()
+    while chunk := await stream.read(1 << 16):
+        buf += chunk
+        if len(buf) > 2 * _TAIL_BYTES:
+            del buf[:-_TAIL_BYTES]
+    return bytes(buf[-_TAIL_BYTES:])
+
+
+def _kill(proc) -> None:
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass  # already exited
+
+
+async def run_pipeline_async(req: RunRequest) -> RunResult:
+    """
+    run_pipeline for the event loop: the pipeline is already a child process,
+    so it is awaited with asyncio's subprocess support instead of parking a
+    thread on subprocess.run. Same result; on timeout the child is killed and
+    subprocess.TimeoutExpired is raised. Only the tail of each output stream
+    is kept in memory.
+    """
+    # off the loop: creating the output folder and manifest touches the disk
+    args, cmd_str, run_env, timeout_sec, manifest = await asyncio.to_thread(_prepare, req)
+    if req.dry_run:
+        return _dry_run(req, cmd_str)
+    try:
+        if _idle is not None:
+            return await _run_on_worker(req, args, cmd_str, timeout_sec)
+        return await _run_child(req, args, cmd_str, run_env, timeout_sec)
+    finally:
+        _drop_manifest(manifest)
+
+
+async def _run_child(req: RunRequest, args: List[str], cmd_str: str, run_env: dict, timeout_sec: int) -> RunResult:
+    proc = await asyncio.create_subprocess_exec(
+        *args,
         cwd=str(BP_ROOT),
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-        shell=False,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
         env=run_env,
-        timeout=timeout_sec,
     )
+    try:
+        out, err, _ = await asyncio.wait_for(
+            asyncio.gather(_tail(proc.stdout), _tail(proc.stderr), proc.wait()), timeout=timeout_sec)
+    except asyncio.TimeoutError:
+        _kill(proc)
+        await proc.wait()
+        raise subprocess.TimeoutExpired(args, timeout_sec)
+    except BaseException:
+        _kill(proc)  # cancelled: don't leave the pipeline running
+        raise
+    return _result(req, cmd_str, proc.returncode, _text(out), _text(err))
 
-    overlays   = _collect(req.out, EXT_OVERLAYS)
-    text_files = _collect(req.out, EXT_TEXTS)
-    jsonls     = _collect(req.out, EXT_JSONLS)
 
-    return RunResult(
-        ok=(proc.returncode == 0),
-        command=cmd_str,
-        stdout=proc.stdout[-50_000:],
-        stderr=proc.stderr[-50_000:],
-        out_dir=req.out,
-        overlays=overlays,
-        text_files=text_files,
-        jsonls=jsonls,
+# ---------- persistent pipeline workers (opt-in: BP_WORKERS > 0) ----------
+# Each `python smoke_test.py` pays interpreter start-up plus the OpenCV/OCR/model
+# imports and warm-up before the first page. With BP_WORKERS=N the API keeps N
+# pipeline_worker.py processes that import once and take jobs as JSON lines on
+# stdin (see BubblePanel-main/pipeline_worker.py). A worker that times out, dies
+# or whose job is cancelled is killed and replaced on next use. Workers are
+# started by start_workers() (the API's lifespan); without them every run
+# spawns smoke_test.py as before.
+
+BP_WORKERS = max(0, int(os.getenv("BP_WORKERS", "0")))
+_WORKER_CMD = (PY_EXE, "pipeline_worker.py")
+_idle: Optional[asyncio.Queue] = None  # idle workers; None = "spawn a fresh one"
+
+
+async def _spawn_worker():
+    return await asyncio.create_subprocess_exec(
+        *_WORKER_CMD,
+        cwd=str(BP_ROOT),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        env=_CHILD_ENV,
+        limit=1 << 24,  # one reply line carries up to ~400 KB of output tail
     )
+
+
+async def start_workers() -> None:
+    global _idle
+    if BP_WORKERS <= 0 or _idle is not None:
+        return
+    _idle = asyncio.Queue()
+    for _ in range(BP_WORKERS):
+        _idle.put_nowait(await _spawn_worker())
+    print(f"[workers] {BP_WORKERS} pipeline worker(s) started")
+
+
+async def stop_workers() -> None:
+    global _idle
+    idle, _idle = _idle, None
+    while idle is not None and not idle.empty():
+        w = idle.get_nowait()
+        if w is not None:
+            _kill(w)
+            await w.wait()
+
+
+async def _run_on_worker(req: RunRequest, args: List[str], cmd_str: str, timeout_sec: int) -> RunResult:
+    idle = _idle
+    w = await idle.get()
+    ok = False
+    try:
+        if w is None or w.returncode is not None:
+            w = await _spawn_worker()
+        w.stdin.write(json.dumps({"argv": args[len(_CMD):]}).encode("utf-8") + b"\n")
+        await w.stdin.drain()
+        try:
+            line = await asyncio.wait_for(w.stdout.readline(), timeout=timeout_sec)
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(args, timeout_sec)
+        if not line:
+            raise RuntimeError("pipeline worker exited unexpectedly")
+        res = json.loads(line)
+        ok = True
+    finally:
+        if not ok and w is not None:
+            _kill(w)  # mid-job state is unknown: never reuse it
+        idle.put_nowait(w if ok else None)
+    return _result(req, cmd_str, res["returncode"], _clip(res["stdout"]), _clip(res["stderr"]))
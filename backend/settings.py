@@ -1,27 +1,65 @@
+import functools
 import os
 from pathlib import Path
+from typing import List, Tuple, Union
 
 # Render Docker listens on port 10000; your Dockerfile already uses that.
 PROJECT_ROOT = Path(__file__).resolve().parents[1]  # repo root (/app)
 BP_ROOT      = Path(os.environ.get("BP_REPO_ROOT", PROJECT_ROOT / "BubblePanel-main")).resolve()
 
-# Upload dir (mapped from /app/uploads)
-UPLOAD_DIR   = Path(os.environ.get("BP_UPLOAD_DIR", "/app/uploads")).resolve()
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Upload dir (mapped from /app/uploads). Outside the container /app is usually
+# not writable: without an explicit BP_UPLOAD_DIR fall back to <repo>/uploads.
+def _upload_dir() -> Path:
+    env = os.environ.get("BP_UPLOAD_DIR")
+    *preferred, last = [env] if env else ["/app/uploads", str(PROJECT_ROOT / "uploads")]
+    for d in preferred:
+        try:
+            Path(d).mkdir(parents=True, exist_ok=True)
+            return Path(d).resolve()
+        except OSError:
+            pass
+    Path(last).mkdir(parents=True, exist_ok=True)
+    return Path(last).resolve()
 
-# Child process config
+UPLOAD_DIR   = _upload_dir()
+
+# Child process config (read once; everything else imports these)
 PY_EXE  = os.environ.get("BP_PYTHON", "python")
 SCRIPT  = os.environ.get("BP_SCRIPT", "smoke_test.py")  # relative to BP_ROOT
+TIMEOUT = int(os.environ.get("BP_TIMEOUT", "1200"))     # seconds per run unless the request sets one
 
 def norm(p: str | None) -> str | None:
     return None if p is None else p.replace("\\", "/")
 
+@functools.lru_cache(maxsize=4096)
 def map_ui_upload_path(ui_path: str) -> Path:
-    """Map UI path (/app/uploads/xxx) or relative paths to real files."""
-    ui_path = norm(ui_path) or ""
+    """
+    Convert a UI path to a server filesystem path (memoized).
+    - '/app/uploads/<file>' -> UPLOAD_DIR/<file>
+    - absolute path         -> unchanged (resolved)
+    - relative              -> resolve under BP_ROOT
+    - empty                 -> Path("") (callers reject an empty input)
+    """
+    ui_path = (norm(ui_path) or "").strip()
+    if not ui_path:
+        return Path("")
     if ui_path.startswith("/app/uploads/"):
-        return UPLOAD_DIR / Path(ui_path).name
+        return (UPLOAD_DIR / Path(ui_path).name).resolve()
     p = Path(ui_path)
     if p.is_absolute():
-        return p
+        return p.resolve()
     return (BP_ROOT / ui_path.lstrip("./")).resolve()
+
+def map_ui_inputs(ui_input: Union[str, List[str]]) -> Tuple[Union[str, List[str]], List[str]]:
+    """
+    map_ui_upload_path over one input or a batch: (mapped input, same shape as
+    given, as str; the mapped paths that are empty or don't exist).
+    """
+    items = ui_input if isinstance(ui_input, list) else [ui_input]
+    mapped = [map_ui_upload_path(p) for p in items]
+    missing = [str(m) if p.strip() else "(empty)" for p, m in zip(items, mapped)
+               if not p.strip() or not m.exists()]
+    if not items:
+        missing = ["(no input)"]
+    out = [str(m) for m in mapped]
+    return (out if isinstance(ui_input, list) else out[0]), missing
@@ -0,0 +1,76 @@
+# backend/web.py — HTTP helpers shared by both APIs (backend.app and backend.main)
+
+import functools, json, os, re, shutil, stat
+from pathlib import Path
+
+from fastapi import HTTPException, Request, Response, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
+
+from backend.settings import UPLOAD_DIR
+
+# Default response class and a bytes encoder for plain JSON values: orjson when
+# installed, else the stdlib with JSONResponse's own settings (same bytes).
+try:
+    import orjson
+    dumps = orjson.dumps
+    DefaultJSONResponse = ORJSONResponse
+except ImportError:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+    DefaultJSONResponse = JSONResponse
+
+FILE_CHUNK = 1 << 20  # bytes per read/write when streaming files
+
+
+class ChunkedFileResponse(FileResponse):
+    # 1 MiB reads instead of Starlette's 64 KiB: far fewer read() calls and
+    # threadpool hops per overlay/JSONL served. Servers that implement the
+    # ASGI pathsend extension get kernel sendfile instead.
+    chunk_size = FILE_CHUNK
+
+
+# ---------- uploads ----------
+_SAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+@functools.lru_cache(maxsize=1024)
+def safe_filename(name: str) -> str:
+    s = _SAFE_RE.sub("_", name or "")
+    return s or "upload"
+
+def save_upload(file: UploadFile) -> Path:
+    """Copy an (already spooled) upload into UPLOAD_DIR in FILE_CHUNK pieces; returns its path."""
+    dest = UPLOAD_DIR / safe_filename(file.filename)  # already canonical: UPLOAD_DIR is resolved, the name has no "/"
+    with dest.open("wb") as f:
+        shutil.copyfileobj(file.file, f, FILE_CHUNK)
+    return dest
+
+
+# ---------- /file ----------
+# Artifacts are rewritten in place when a job re-runs into the same folder, so
+# /file answers are cacheable but always revalidated: the ETag (size + mtime)
+# turns a repeat view of an unchanged overlay into a body-less 304.
+_FILE_CACHE = "no-cache"
+
+def _file_etag(st: os.stat_result) -> str:
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in inm.split(",")]
+    return "*" in tags or etag in tags
+
+def file_response(path: str, request: Request) -> Response:
+    """The file at `path` (404 unless a regular file), or a 304 if the client's copy is current."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+    headers = {"ETag": _file_etag(st), "Cache-Control": _FILE_CACHE}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return ChunkedFileResponse(path, stat_result=st, headers=headers)
@@ -58,8 +58,9 @@ export async function runJob(body) {
   return json;
 }
 
-export async function pollJob(jobId) {
-  const r = await fetch(`${API}/run/${jobId}`);
+// Long-poll: the server holds the request until the job finishes or `wait` s pass.
+export async function pollJob(jobId, wait = 20) {
+  const r = await fetch(`${API}/run/${jobId}?wait=${wait}`);
   const { text, json } = await readBody(r);
   if (!r.ok) throw httpError(r, text);
   return json ?? {};